@@ -15,6 +15,8 @@ from scipy import stats
 import matplotlib
 matplotlib.use("Agg")  # <-- Add this line
 
+from routes import catalog
+
 router = APIRouter(prefix="/linear-regression", tags=["AI Model Tools"])
 
 # Directory to save generated files
@@ -1643,6 +1645,9 @@ async def save_to_db(payload: dict):
                 if_exists="replace",   # overwrite if exists
                 index=False
             )
+            # ✅ New/replaced table: refresh the cached catalog of this schema
+            url = engine.url
+            catalog.invalidate(f"{url.host}:{url.port}/{url.database}", DB_CONFIG["schema"])
             engine.dispose()
 
         print(f"✅ Saved shapefile to DB table: {DB_CONFIG['schema']}.{table_name}")
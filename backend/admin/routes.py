@@ -8,7 +8,8 @@ from datetime import datetime, timedelta
 
 from auth.dependencies import get_current_admin
 from auth.models import Admin, User, UserRegistrationRequest, Credentials
-from db import get_auth_db
+from db import get_auth_db, get_user_database_session
+from routes import catalog, layer_changes, search_indexes
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -789,4 +790,66 @@ async def get_admin_statistics(
             "pending_registrations": pending_registrations  # NEW
         },
         "generated_at": datetime.utcnow().isoformat()
-    }
\ No newline at end of file
+    }
+
+# Build the trigram indexes used by property / global search (explicit
+# migration step; search requests never run DDL)
+@router.post("/search-indexes")
+def create_search_indexes(
+    provincial_access: str,
+    schema: str,
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """Create missing (or rebuild invalid) trigram search indexes for a municipal schema"""
+    try:
+        db = get_user_database_session(strip_suffix(provincial_access))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    try:
+        targets = search_indexes.search_index_targets(db, schema)
+        if not targets:
+            raise HTTPException(status_code=404, detail=f"No searchable tables found in schema '{schema}'")
+
+        engine = db.get_bind()
+        results = {
+            table: search_indexes.ensure_trgm_indexes(engine, schema, table, columns)
+            for table, columns in targets.items()
+        }
+    finally:
+        db.close()
+
+    failed = sum(1 for table in results.values() for status in table.values() if status != "ok")
+    return {
+        "message": "Search indexes ready" if not failed else f"{failed} search index(es) failed",
+        "indexes": results,
+        "performed_by": current_admin.user_name,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+# Index the parcel change log on transaction_date (used by /layers/{schema}/changes)
+@router.post("/change-log-index")
+def create_change_log_index(
+    provincial_access: str,
+    schema: str,
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """Create (or rebuild if invalid) the transaction_date index of a schema's parcel_transaction_log"""
+    try:
+        db = get_user_database_session(strip_suffix(provincial_access))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    try:
+        if not catalog.table_exists(db, schema, "parcel_transaction_log"):
+            raise HTTPException(status_code=404, detail=f"No parcel_transaction_log in schema '{schema}'")
+        result = layer_changes.ensure_change_log_index(db.get_bind(), schema)
+    finally:
+        db.close()
+
+    return {
+        "message": "Change log index ready" if result == "ok" else f"Change log index failed: {result}",
+        "performed_by": current_admin.user_name,
+        "timestamp": datetime.utcnow().isoformat()
+    }
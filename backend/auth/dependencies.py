@@ -102,9 +102,6 @@ def get_user_main_db(current_user: User = Depends(get_current_user)) -> Generato
     Get the database connection based on user's provincial access
     THIS IS THE KEY FUNCTION that routes users to their provincial database
     """
-    # Check user access using existing access_control
-    access_info = AccessControl.check_user_access(current_user)
-    
     # If no provincial access, raise error
     if not current_user.provincial_access:
         raise HTTPException(
@@ -117,17 +114,8 @@ def get_user_main_db(current_user: User = Depends(get_current_user)) -> Generato
         # Get database session for user's provincial database
         db = get_user_database_session(current_user.provincial_access)
         
-        # Verify we're connected to the correct database
-        result = db.execute(text("SELECT current_database()"))
-        current_db = result.scalar()
-        
-        print(f"=== DATABASE CONNECTION ===")
-        print(f"User: {current_user.user_name}")
-        print(f"Provincial Access: {current_user.provincial_access}")
-        print(f"Connected to Database: {current_db}")
-        print(f"Municipal Access: {current_user.municipal_access}")
-        print(f"Access Status: {access_info['status']}")
-        print(f"========================")
+        # The database name is verified when the session factory is created
+        # (db.get_user_database_session), not on every request
         
         yield db
     except ValueError as e:
@@ -1,8 +1,10 @@
 from sqlalchemy import create_engine, text, or_
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.ext.declarative import declarative_base
-from typing import Dict
+from typing import Dict, Tuple
 import os
+import threading
+import time
 from dotenv import load_dotenv
 import psycopg
 from psycopg.rows import dict_row
@@ -30,6 +32,14 @@ AuthSessionLocal = sessionmaker(bind=auth_engine)
 # Cache for database engines
 _db_engines: Dict[str, any] = {}
 
+# Seconds a provincial_access -> session factory lookup is reused before the
+# credentials table is read again
+CREDENTIALS_CACHE_SECONDS = int(os.getenv("CREDENTIALS_CACHE_SECONDS", "600"))
+
+# provincial_access -> (looked_up_at, sessionmaker)
+_session_factories: Dict[str, Tuple[float, sessionmaker]] = {}
+_session_factories_lock = threading.Lock()
+
 
 def get_auth_db():
     """Get session for auth database (credentials_login)"""
@@ -59,6 +69,10 @@ def get_user_database_session(provincial_access: str) -> Session:
     if not provincial_access:
         raise ValueError("User has no provincial access assigned")
 
+    cached = _session_factories.get(provincial_access)
+    if cached and time.time() - cached[0] < CREDENTIALS_CACHE_SECONDS:
+        return cached[1]()
+
     auth_db = AuthSessionLocal()
     try:
         # Match dbname by prefix (PSA code)
@@ -74,9 +88,27 @@ def get_user_database_session(provincial_access: str) -> Session:
         # Step 2: Create/get engine for that DB
         engine = get_database_engine_from_credentials(creds)
 
-        # Step 3: Return SQLAlchemy session
+        # Step 3: Verify the new factory reaches the expected database
+        # (done here once per lookup instead of on every request)
         SessionLocal = sessionmaker(bind=engine)
-        return SessionLocal()
+        session = SessionLocal()
+        try:
+            current_db = session.execute(text("SELECT current_database()")).scalar()
+            if current_db != creds.dbname:
+                raise RuntimeError(
+                    f"Connected to database {current_db}, expected {creds.dbname} "
+                    f"for provincial_access {provincial_access}"
+                )
+        except Exception:
+            # Return the pooled connection before reporting the failure
+            session.close()
+            raise
+        print(f"✅ {provincial_access} connected to database: {current_db}")
+
+        # Step 4: Cache the factory and return the session
+        with _session_factories_lock:
+            _session_factories[provincial_access] = (time.time(), SessionLocal)
+        return session
     finally:
         auth_db.close()
 
@@ -9,6 +9,8 @@ import uvicorn
 from auth.routes import router as auth_router
 from admin.routes import router as admin_router 
 from routes.geomdisplay import router as geom_router
+from routes.tiles import router as tiles_router
+from routes.layer_changes import router as layer_changes_router
 from routes.schemas import router as schema_router
 from routes.parcelinfo import router as parcel_router
 from routes.edit import router as edit_router
@@ -53,6 +55,8 @@ app.add_middleware(
 app.include_router(auth_router, prefix="/api")
 app.include_router(admin_router, prefix="/api")
 app.include_router(geom_router, prefix="/api")
+app.include_router(tiles_router, prefix="/api")
+app.include_router(layer_changes_router, prefix="/api")
 app.include_router(schema_router, prefix="/api")
 app.include_router(parcel_router, prefix="/api")
 app.include_router(orthophoto_router, prefix="/api")
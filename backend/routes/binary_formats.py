@@ -0,0 +1,96 @@
+# routes/binary_formats.py
+# Bulk encoders for binary layer output: FlatGeobuf (pyogrio) and Arrow IPC.
+import io
+from decimal import Decimal
+from typing import Dict, Optional
+
+import geopandas as gpd
+import pandas as pd
+from fastapi import HTTPException, Response
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+try:
+    import pyogrio
+    HAS_PYOGRIO = True
+except Exception:
+    HAS_PYOGRIO = False
+
+try:
+    import pyarrow as pa
+    HAS_ARROW = True
+except Exception:
+    HAS_ARROW = False
+
+BINARY_FORMATS = ("fgb", "arrow")
+
+MEDIA_TYPES = {
+    "fgb": "application/octet-stream",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+def read_frame(db: Session, sql: str, params: Optional[Dict] = None, geom_col: Optional[str] = None):
+    """Run one query and load the whole result as a (Geo)DataFrame."""
+    conn = db.connection()
+    if geom_col:
+        frame = gpd.read_postgis(text(sql), con=conn, geom_col=geom_col, params=params or {})
+    else:
+        frame = pd.read_sql(text(sql), con=conn, params=params or {})
+
+    # numeric columns come back as Decimal objects; encoders want floats
+    for col in frame.columns:
+        if frame[col].dtype == object and col != geom_col:
+            sample = frame[col].dropna()
+            if not sample.empty and isinstance(sample.iloc[0], Decimal):
+                frame[col] = pd.to_numeric(frame[col], errors="coerce")
+    return frame
+
+
+def to_flatgeobuf(frame: gpd.GeoDataFrame, layer: str) -> bytes:
+    if not HAS_PYOGRIO:
+        raise HTTPException(status_code=501, detail="FlatGeobuf output requires pyogrio")
+    buffer = io.BytesIO()
+    pyogrio.write_dataframe(
+        frame, buffer, driver="FlatGeobuf", layer=layer, promote_to_multi=True
+    )
+    return buffer.getvalue()
+
+
+def to_arrow_ipc(frame: pd.DataFrame) -> bytes:
+    """Arrow IPC stream; geometry is GeoArrow-encoded (WKB if types are mixed)."""
+    if not HAS_ARROW:
+        raise HTTPException(status_code=501, detail="Arrow output requires pyarrow")
+
+    if isinstance(frame, gpd.GeoDataFrame):
+        try:
+            table = pa.table(frame.to_arrow(index=False, geometry_encoding="geoarrow"))
+        except (ValueError, NotImplementedError):
+            table = pa.table(frame.to_arrow(index=False, geometry_encoding="WKB"))
+    else:
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_frame(frame: pd.DataFrame, layer_format: str, name: str) -> bytes:
+    if layer_format == "fgb":
+        if not isinstance(frame, gpd.GeoDataFrame):
+            raise HTTPException(status_code=400, detail="format=fgb needs a geometry column")
+        return to_flatgeobuf(frame, name)
+    return to_arrow_ipc(frame)
+
+
+def binary_response(body: bytes, layer_format: str, name: str, headers: Optional[Dict] = None) -> Response:
+    extension = "fgb" if layer_format == "fgb" else "arrow"
+    return Response(
+        content=body,
+        media_type=MEDIA_TYPES[layer_format],
+        headers={
+            **(headers or {}),
+            "Content-Disposition": f'inline; filename="{name}.{extension}"',
+        }
+    )
@@ -0,0 +1,153 @@
+# routes/boundary_cache.py
+# In-memory LRU of generalized boundary sets and bounds, per database/schema.
+#
+# Boundaries almost never change but are requested at every session start,
+# so they are loaded once (both tables concurrently), simplified, and
+# shared by /municipal-boundaries, find-barangay and the bounds endpoints.
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+from shapely.geometry import Point, shape
+from shapely.strtree import STRtree
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from routes import catalog
+
+# Max cached entries (boundary sets + bounds); least recently used dropped first
+BOUNDARY_CACHE_SIZE = int(os.getenv("BOUNDARY_CACHE_SIZE", "32"))
+
+# Entries are reloaded after this many seconds (changes made outside the app)
+BOUNDARY_CACHE_MAX_AGE = int(os.getenv("BOUNDARY_CACHE_MAX_AGE", "3600"))
+
+# Simplification tolerance in degrees (~1 m)
+BOUNDARY_TOLERANCE = float(os.getenv("BOUNDARY_TOLERANCE", "0.00001"))
+
+BOUNDARY_TABLES = (("barangay", "BarangayBoundary"), ("section", "SectionBoundary"))
+
+_lock = threading.Lock()
+
+# (kind, db_key, schema) -> (loaded_at, value)
+_entries: "OrderedDict[Tuple[str, str, Optional[str]], Tuple[float, object]]" = OrderedDict()
+
+
+def cached(kind: str, db_key: str, schema: Optional[str], loader: Callable[[], object]):
+    """Return the cached value for (kind, db, schema), loading it on a miss."""
+    entry_key = (kind, db_key, schema)
+    with _lock:
+        entry = _entries.get(entry_key)
+        if entry and time.time() - entry[0] < BOUNDARY_CACHE_MAX_AGE:
+            _entries.move_to_end(entry_key)
+            return entry[1]
+
+    value = loader()
+
+    with _lock:
+        _entries[entry_key] = (time.time(), value)
+        _entries.move_to_end(entry_key)
+        while len(_entries) > BOUNDARY_CACHE_SIZE:
+            _entries.popitem(last=False)
+    return value
+
+
+def invalidate(db_key: str, schema: str):
+    """Drop every entry of a schema (called from layer_versions.layer_changed)."""
+    with _lock:
+        for entry_key in [k for k in _entries if k[1] == db_key and k[2] == schema]:
+            del _entries[entry_key]
+
+
+# ==========================================================
+# 🧭 Barangay + Section boundary sets
+# ==========================================================
+def _load_collection(engine, schema: str, table: str) -> Optional[dict]:
+    """One generalized FeatureCollection, on its own pooled connection."""
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(
+                text(f'''
+                    SELECT t.*, ST_AsGeoJSON(
+                        ST_SimplifyPreserveTopology(t.geom, :tolerance)
+                    )::json AS geometry
+                    FROM "{schema}"."{table}" t
+                    WHERE t.geom IS NOT NULL
+                '''),
+                {"tolerance": BOUNDARY_TOLERANCE}
+            ).mappings().all()
+    except Exception as e:
+        print(f"⚠️ {table} fetch failed for {schema}: {e}")
+        return None
+
+    print(f"✅ Loaded {len(rows)} {table} features (generalized).")
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "geometry": row["geometry"],
+                "properties": {k: v for k, v in row.items() if k not in ("geom", "geometry")}
+            }
+            for row in rows
+        ]
+    }
+
+
+class BoundarySet:
+    """Generalized barangay/section collections of one schema."""
+
+    def __init__(self, collections: Dict[str, Optional[dict]]):
+        self.collections = collections
+        self.topology: Optional[dict] = None
+        self._tree: Optional[STRtree] = None
+        self._names = []
+        self._tree_lock = threading.Lock()
+
+    def _barangay_tree(self) -> STRtree:
+        with self._tree_lock:
+            if self._tree is None:
+                shapes, names = [], []
+                for feature in (self.collections.get("barangay") or {}).get("features", []):
+                    shapes.append(shape(feature["geometry"]))
+                    names.append(feature["properties"].get("barangay"))
+                self._tree = STRtree(shapes)
+                self._names = names
+            return self._tree
+
+    def find_barangay(self, lng: float, lat: float) -> Optional[str]:
+        """
+        Barangay containing the point, or None when the generalized shapes
+        cannot decide: no hit, several hits, or a point closer to the
+        simplified edge than the simplification tolerance (the true edge may
+        be on either side). Callers confirm None results in PostGIS.
+        """
+        tree = self._barangay_tree()
+        point = Point(lng, lat)
+        hits = tree.query(point, predicate="within")
+        if len(hits) != 1:
+            return None
+        polygon = tree.geometries[hits[0]]
+        if polygon.boundary.distance(point) <= BOUNDARY_TOLERANCE:
+            return None
+        return self._names[hits[0]]
+
+
+def boundary_set(db: Session, schema: str) -> BoundarySet:
+    """Cached boundary set of a schema; both tables are loaded concurrently."""
+    def load():
+        engine = db.get_bind()
+        with ThreadPoolExecutor(max_workers=len(BOUNDARY_TABLES)) as pool:
+            futures = {
+                key: pool.submit(_load_collection, engine, schema, table)
+                for key, table in BOUNDARY_TABLES
+            }
+            collections = {key: future.result() for key, future in futures.items()}
+        if not any(collections.values()):
+            # Not cached: a missing table or a failed load is retried next time
+            raise LookupError(f"No BarangayBoundary or SectionBoundary found for schema={schema}")
+        return BoundarySet(collections)
+
+    return cached("boundaries", catalog.db_key(db), schema, load)
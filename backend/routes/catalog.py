@@ -0,0 +1,146 @@
+# routes/catalog.py
+# Per-database cache of information_schema lookups (schemas, tables, columns).
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Seconds before a cached schema listing / table catalog is reloaded
+CATALOG_TTL_SECONDS = int(os.getenv("CATALOG_TTL_SECONDS", "300"))
+
+_lock = threading.Lock()
+
+# db_key -> {"schemas": (loaded_at, [schema, ...]),
+#            "tables": {schema: (loaded_at, {table: [(column, data_type, udt_name), ...]})}}
+_catalogs: Dict[str, Dict] = {}
+
+
+def db_key(db: Session) -> str:
+    """Identify the database behind a session (same key format as db._db_engines)."""
+    url = db.get_bind().url
+    return f"{url.host}:{url.port}/{url.database}"
+
+
+def _entry(key: str) -> Dict:
+    with _lock:
+        return _catalogs.setdefault(key, {"schemas": None, "tables": {}})
+
+
+def _fresh(cached: Optional[Tuple[float, object]]) -> bool:
+    return cached is not None and time.time() - cached[0] < CATALOG_TTL_SECONDS
+
+
+def invalidate(db_or_key, schema: Optional[str] = None):
+    """
+    Drop cached catalog data after the app itself runs DDL.
+    With a schema only that schema's tables are reloaded on next use.
+    """
+    key = db_or_key if isinstance(db_or_key, str) else db_key(db_or_key)
+    with _lock:
+        if key not in _catalogs:
+            return
+        if schema is None:
+            del _catalogs[key]
+        else:
+            _catalogs[key]["schemas"] = None
+            _catalogs[key]["tables"].pop(schema, None)
+
+
+# ==========================================================
+# 📚 Schemas
+# ==========================================================
+def list_schemas(db: Session) -> List[str]:
+    """All schemas of the database, excluding pg_* and information_schema."""
+    entry = _entry(db_key(db))
+    cached = entry["schemas"]
+    if _fresh(cached):
+        return list(cached[1])
+
+    result = db.execute(text("""
+        SELECT schema_name
+        FROM information_schema.schemata
+        WHERE schema_name <> 'information_schema'
+          AND schema_name NOT LIKE 'pg_%'
+        ORDER BY schema_name
+    """))
+    schemas = [row[0] for row in result]
+
+    with _lock:
+        entry["schemas"] = (time.time(), schemas)
+    return list(schemas)
+
+
+# ==========================================================
+# 📋 Tables and columns
+# ==========================================================
+def _schema_tables(db: Session, schema: str) -> Dict[str, List[Tuple[str, str, str]]]:
+    entry = _entry(db_key(db))
+    cached = entry["tables"].get(schema)
+    if _fresh(cached):
+        return cached[1]
+
+    result = db.execute(
+        text("""
+            SELECT table_name, column_name, data_type, udt_name
+            FROM information_schema.columns
+            WHERE table_schema = :schema
+            ORDER BY table_name, ordinal_position
+        """),
+        {"schema": schema}
+    )
+    tables: Dict[str, List[Tuple[str, str, str]]] = {}
+    for table_name, column_name, data_type, udt_name in result:
+        tables.setdefault(table_name, []).append((column_name, data_type, udt_name))
+
+    with _lock:
+        entry["tables"][schema] = (time.time(), tables)
+    return tables
+
+
+def list_tables(db: Session, schema: str) -> List[str]:
+    return sorted(_schema_tables(db, schema))
+
+
+def table_exists(db: Session, schema: str, table: str) -> bool:
+    return table in _schema_tables(db, schema)
+
+
+def table_columns(db: Session, schema: str, table: str) -> List[str]:
+    """Column names in ordinal order ([] if the table does not exist)."""
+    return [c[0] for c in _schema_tables(db, schema).get(table, [])]
+
+
+def column_types(db: Session, schema: str, table: str) -> Dict[str, str]:
+    """Column name -> information_schema data_type (udt_name for USER-DEFINED)."""
+    return {
+        name: (udt_name if data_type == "USER-DEFINED" else data_type)
+        for name, data_type, udt_name in _schema_tables(db, schema).get(table, [])
+    }
+
+
+def geometry_tables(db: Session, schema: str) -> List[str]:
+    """Tables with a PostGIS geometry column."""
+    return sorted(
+        table for table, cols in _schema_tables(db, schema).items()
+        if any(udt_name == "geometry" for _, _, udt_name in cols)
+    )
+
+
+def pin_tables(db: Session, schema: str) -> List[str]:
+    """Tables with a pin column."""
+    return sorted(
+        table for table, cols in _schema_tables(db, schema).items()
+        if any(name == "pin" for name, _, _ in cols)
+    )
+
+
+def tables_with_columns(db: Session, schema: str, columns: List[str]) -> List[str]:
+    """Tables having every one of the given column names."""
+    wanted = set(columns)
+    return sorted(
+        table for table, cols in _schema_tables(db, schema).items()
+        if wanted <= {name for name, _, _ in cols}
+    )
@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Request, Depends, HTTPException
 from sqlalchemy.orm import Session
 from datetime import datetime
-import json
 from psycopg2.extras import RealDictCursor
 
 from auth.dependencies import get_user_main_db, get_current_user
 from auth.models import User
+from routes import layer_versions
+from routes import catalog
 
 router = APIRouter()
 
@@ -21,11 +22,12 @@ async def merge_parcels_postgis(
     table = data.get("table")
     base_props = data.get("base_props")
     original_pins = data.get("original_pins")
-    geometries = data.get("geometries")
+    # "geometries" is no longer needed: the union is taken from the stored parcels
 
-    if not schema or not table or not base_props or not original_pins or not geometries:
+    if not schema or not table or not base_props or not original_pins:
         return {"status": "error", "message": "Missing required data."}
 
+    original_pins = list(original_pins)
     full_table = f'"{schema}"."{table}"'
     log_table = f'"{schema}"."parcel_transaction_log"'
     attr_table = f'"{schema}"."JoinedTable"'
@@ -34,33 +36,14 @@ async def merge_parcels_postgis(
         conn = db.connection().connection
 
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            # STEP 1: Detect existing columns
-            cur.execute("""
-                SELECT column_name FROM information_schema.columns
-                WHERE table_schema = %s AND table_name = %s
-            """, (schema, table))
-            parcel_columns = [r["column_name"] for r in cur.fetchall()]
+            # STEP 1: Detect existing columns (cached catalog)
+            parcel_columns = catalog.table_columns(db, schema, table)
             allowed_columns = set(parcel_columns) - {"geom"}
 
             # STEP 1.1: Detect columns in parcel_transaction_log
-            cur.execute("""
-                SELECT column_name FROM information_schema.columns
-                WHERE table_schema = %s AND table_name = %s
-            """, (schema, "parcel_transaction_log"))
-            log_columns = [r["column_name"] for r in cur.fetchall()]
-
-            # STEP 2: Merge geometries
-            geojson_strings = [json.dumps(g) for g in geometries]
-            union_args = ', '.join(['ST_GeomFromGeoJSON(%s)'] * len(geojson_strings))
-            cur.execute(f"""
-                SELECT ST_AsGeoJSON(ST_Union(ARRAY[{union_args}])) AS merged;
-            """, geojson_strings)
-            merged_result = cur.fetchone()
-            merged_geom = merged_result["merged"]
-            if not merged_geom:
-                return {"status": "error", "message": "Geometry union failed."}
+            log_columns = catalog.table_columns(db, schema, "parcel_transaction_log")
 
-            # STEP 3: Generate new PIN
+            # STEP 2: Generate new PIN
             prefix = original_pins[0].rsplit("-", 1)[0]
             if "barangay" in base_props and "barangay" in allowed_columns:
                 cur.execute(f"""
@@ -78,7 +61,7 @@ async def merge_parcels_postgis(
             next_suffix = max(suffixes or [0]) + 1
             new_pin = f"{prefix}-{str(next_suffix).zfill(3)}"
 
-            # STEP 4: Insert new parcel
+            # STEP 3: Insert new parcel with the union of the originals (server side)
             base_props["pin"] = new_pin
             base_props["parcel"] = ""
             base_props["section"] = ""
@@ -91,8 +74,14 @@ async def merge_parcels_postgis(
 
             cur.execute(f"""
                 INSERT INTO {full_table} ({columns}, geom)
-                VALUES ({placeholders}, ST_SetSRID(ST_GeomFromGeoJSON(%s), 4326))
-            """, values + [merged_geom])
+                SELECT {placeholders}, ST_Union(geom)
+                FROM {full_table}
+                WHERE pin = ANY(%s)
+                HAVING ST_Union(geom) IS NOT NULL
+            """, values + [original_pins])
+            if cur.rowcount == 0:
+                conn.rollback()
+                return {"status": "error", "message": "Geometry union failed."}
 
             # Insert new parcel into JoinedTable
             cur.execute(f"""
@@ -100,64 +89,76 @@ async def merge_parcels_postgis(
                 VALUES (%s)
             """, (new_pin,))
 
-            # STEP 5: Log the new parcel safely
-            new_transaction_date = datetime.now()
+            # STEP 4: Log the new parcel safely
+            transaction_date = datetime.now()
             loggable_props = {k: v for k, v in clean_props.items() if k in log_columns}
 
             new_log_fields = ['"table_name"', '"transaction_type"', '"transaction_date"'] + \
                              [f'"{col}"' for col in loggable_props] + ['"geom"']
-            new_log_placeholders = ['%s'] * (3 + len(loggable_props)) + ['ST_GeomFromGeoJSON(%s)']
-            new_log_values = [table, "new (consolidate)", new_transaction_date] + \
-                             list(loggable_props.values()) + [merged_geom]
+            new_log_placeholders = ['%s'] * (3 + len(loggable_props))
+            new_log_values = [table, "new (consolidate)", transaction_date] + \
+                             list(loggable_props.values()) + [new_pin]
 
             cur.execute(f"""
                 INSERT INTO {log_table} ({', '.join(new_log_fields)})
-                VALUES ({', '.join(new_log_placeholders)})
+                SELECT {', '.join(new_log_placeholders)}, geom
+                FROM {full_table}
+                WHERE pin = %s
             """, new_log_values)
 
-            # STEP 6: Log old parcels safely
-            for pin in original_pins:
-                cur.execute(f"""
-                    SELECT *, ST_AsGeoJSON(geom)::json AS geometry
-                    FROM {full_table}
-                    WHERE pin = %s
-                """, (pin,))
-                parcel_row = cur.fetchone()
-                if not parcel_row:
+            # STEP 5: Log old parcels in one statement. JoinedTable values win
+            # over parcel values when a PIN has an attribute row.
+            # Full type names (format_type), usable as cast targets and exact
+            # enough to compare (array element types, typmods)
+            cur.execute("""
+                SELECT c.relname, a.attname, format_type(a.atttypid, a.atttypmod) AS type
+                FROM pg_attribute a
+                JOIN pg_class c ON c.oid = a.attrelid
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                WHERE n.nspname = %s AND c.relname = ANY(%s)
+                  AND a.attnum > 0 AND NOT a.attisdropped
+            """, (schema, ["JoinedTable", table, "parcel_transaction_log"]))
+            types = {}
+            for row in cur.fetchall():
+                types.setdefault(row["relname"], {})[row["attname"]] = row["type"]
+            attr_types = types.get("JoinedTable", {})
+            parcel_types = types.get(table, {})
+            log_types = types.get("parcel_transaction_log", {})
+            skipped = {"geom", "geometry", "table_name", "id", "transaction_type", "transaction_date"}
+
+            old_log_columns = []
+            old_log_exprs = []
+            for col in log_columns:
+                if col in skipped or (col not in attr_types and col not in parcel_types):
                     continue
-
-                cur.execute(f"""
-                    SELECT * FROM {attr_table}
-                    WHERE pin = %s
-                """, (pin,))
-                attr_row = cur.fetchone() or {}
-
-                merged_data = {**parcel_row, **attr_row}
-                geom = merged_data.pop("geometry", None)
-                merged_data.pop("geom", None)
-                merged_data.pop("table_name", None)
-                merged_data.pop("id", None)
-
-                # Filter to existing log table columns
-                filtered_data = {k: v for k, v in merged_data.items() if k in log_columns}
-
-                transaction_date = datetime.now()
-                log_fields = ['"table_name"', '"transaction_type"', '"transaction_date"'] + \
-                             [f'"{f}"' for f in filtered_data] + ['"geom"']
-                log_placeholders = ['%s'] * (3 + len(filtered_data)) + ['ST_GeomFromGeoJSON(%s)']
-                log_values = [table, "consolidated", transaction_date] + \
-                             list(filtered_data.values()) + [json.dumps(geom)]
-
-                cur.execute(f"""
-                    INSERT INTO {log_table} ({', '.join(log_fields)})
-                    VALUES ({', '.join(log_placeholders)})
-                """, log_values)
-
-                # Delete old parcel entries
-                cur.execute(f'DELETE FROM {full_table} WHERE pin = %s', (pin,))
-                cur.execute(f'DELETE FROM {attr_table} WHERE pin = %s', (pin,))
+                if col not in parcel_types:
+                    expr = f'a."{col}"'
+                elif col not in attr_types:
+                    expr = f'p."{col}"'
+                elif attr_types[col] == parcel_types[col]:
+                    expr = f'CASE WHEN a.pin IS NOT NULL THEN a."{col}" ELSE p."{col}" END'
+                else:
+                    expr = f'(CASE WHEN a.pin IS NOT NULL THEN a."{col}"::text ELSE p."{col}"::text END)::{log_types[col]}'
+                old_log_columns.append(f'"{col}"')
+                old_log_exprs.append(expr)
+
+            old_log_fields = ['"table_name"', '"transaction_type"', '"transaction_date"'] + \
+                             old_log_columns + ['"geom"']
+            cur.execute(f"""
+                INSERT INTO {log_table} ({', '.join(old_log_fields)})
+                SELECT %s, %s, %s, {', '.join(old_log_exprs + ['p.geom'])}
+                FROM {full_table} p
+                LEFT JOIN {attr_table} a ON a.pin = p.pin
+                WHERE p.pin = ANY(%s)
+            """, (table, "consolidated", transaction_date, original_pins))
+            print(f"📝 Logged {cur.rowcount} consolidated parcels.")
+
+            # STEP 6: Delete old parcel entries
+            cur.execute(f'DELETE FROM {full_table} WHERE pin = ANY(%s)', (original_pins,))
+            cur.execute(f'DELETE FROM {attr_table} WHERE pin = ANY(%s)', (original_pins,))
 
             conn.commit()
+            layer_versions.layer_changed(db, schema, pins=original_pins + [new_pin])
             print(f"✅ Consolidation successful for user {current_user.user_name}: New PIN {new_pin}")
             return {"status": "success", "new_pin": new_pin}
 
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Request, Depends
 from auth.dependencies import get_current_user, get_user_main_db
 from auth.models import User
+from routes import catalog, layer_versions
 from sqlalchemy.orm import Session
 from datetime import datetime
 import json
@@ -8,6 +9,9 @@ from psycopg2.extras import RealDictCursor
 
 router = APIRouter()
 
+# Parcels accepted per /update-parcels-bulk call
+BULK_EDIT_MAX = 5000
+
 @router.post("/update-parcel")
 async def update_parcel(
     request: Request,
@@ -144,6 +148,7 @@ async def update_parcel(
             print(f"🔄 Updated pin in JoinedTable: {old_pin} → {new_pin}")
 
         conn.commit()
+        layer_versions.layer_changed(db, schema, pins=[old_pin, new_pin])
         print("✅ Parcel edit completed.")
         return {"status": "success", "message": "Parcel edited and logged successfully."}
 
@@ -153,4 +158,192 @@ async def update_parcel(
         except:
             pass
         print("❌ Error during update:", str(e))
-        return {"status": "error", "message": str(e)}
\ No newline at end of file
+        return {"status": "error", "message": str(e)}
+
+
+# ==========================================================
+# 📦 BULK ATTRIBUTE / PIN EDIT
+# ==========================================================
+@router.post("/update-parcels-bulk")
+async def update_parcels_bulk(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_user_main_db)
+):
+    """
+    Apply many attribute and PIN edits in one transaction.
+
+    Body: {"schema", "table", "updates": [{"pin", "new_pin"?, "fields"?}, ...]}
+    "fields" maps JoinedTable columns to new values. Before and after rows are
+    logged with one INSERT ... SELECT each; nothing is written if any PIN is
+    missing or a new PIN is already taken. Chains and swaps (a new PIN that
+    another update in the batch vacates) are rejected: send them as
+    separate requests.
+    """
+    data = await request.json()
+    schema = data.get("schema")
+    geom_table_name = data.get("table")
+    updates = data.get("updates") or []
+
+    if not schema or not geom_table_name or not updates:
+        return {"status": "error", "message": "Missing required data."}
+    if len(updates) > BULK_EDIT_MAX:
+        return {"status": "error", "message": f"At most {BULK_EDIT_MAX} parcels per request."}
+
+    attr_columns = catalog.table_columns(db, schema, "JoinedTable")
+    log_columns = set(catalog.table_columns(db, schema, "parcel_transaction_log"))
+    if not attr_columns or not log_columns:
+        return {"status": "error", "message": "JoinedTable or parcel_transaction_log not found."}
+    if not catalog.table_exists(db, schema, geom_table_name):
+        return {"status": "error", "message": f"Table {geom_table_name} not found."}
+
+    # --- Validate and normalize edits
+    edits = []
+    edited_columns = set()
+    for update in updates:
+        old_pin = update.get("pin")
+        new_pin = update.get("new_pin") or old_pin
+        fields = dict(update.get("fields") or {})
+        fields.pop("pin", None)
+        if not old_pin:
+            return {"status": "error", "message": "Every update needs a pin."}
+        bad = [k for k in fields if k not in attr_columns or k.lower() in ("id", "geom")]
+        if bad:
+            return {"status": "error", "message": f"Unknown or read-only fields: {', '.join(bad)}"}
+        edited_columns.update(fields)
+        edits.append({"old_pin": old_pin, "new_pin": new_pin, "fields": fields})
+
+    old_pins = [e["old_pin"] for e in edits]
+    new_pins = [e["new_pin"] for e in edits]
+    if len(set(old_pins)) != len(old_pins) or len(set(new_pins)) != len(new_pins):
+        return {"status": "error", "message": "Duplicate PINs in updates."}
+    chained = sorted({e["new_pin"] for e in edits if e["new_pin"] != e["old_pin"]} & set(old_pins))
+    if chained:
+        return {
+            "status": "error",
+            "message": "New PINs that are also renamed in the same batch (chains/swaps) are not supported.",
+            "conflicts": chained
+        }
+
+    print(f"🔍 Bulk edit: {len(edits)} parcels in {schema}.{geom_table_name}")
+
+    parcel_table = f'"{schema}"."{geom_table_name}"'
+    attr_table = f'"{schema}"."JoinedTable"'
+    log_table = f'"{schema}"."parcel_transaction_log"'
+
+    # Attribute columns copied into the log (same set as update-parcel)
+    logged = [c for c in attr_columns if c.lower() not in ("id", "geom") and c in log_columns]
+    log_fields = ", ".join(['"table_name"', '"transaction_type"', '"transaction_date"'] +
+                           [f'"{c}"' for c in logged] + ['"geom"'])
+    attr_values = ", ".join(f'a."{c}"' for c in logged)
+
+    # Only provided fields are written; others keep their current value
+    set_sql = ", ".join(
+        [f'"{c}" = CASE WHEN n.fields ? \'{c}\' THEN (n.r)."{c}" ELSE a."{c}" END'
+         for c in sorted(edited_columns)] +
+        ['"pin" = n.new_pin']
+    )
+
+    try:
+        conn = db.connection().connection
+        timestamp = datetime.now()
+
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            # 1. Stage edits; the edited-field list is computed against current values
+            cur.execute(f'''
+                CREATE TEMP TABLE _bulk_edit ON COMMIT DROP AS
+                SELECT e.old_pin, e.new_pin, e.fields,
+                       a.pin IS NOT NULL AS found,
+                       EXISTS (SELECT 1 FROM {parcel_table} p WHERE p.pin = e.old_pin) AS has_geom,
+                       e.new_pin <> e.old_pin AND (
+                           EXISTS (SELECT 1 FROM {attr_table} t WHERE t.pin = e.new_pin) OR
+                           EXISTS (SELECT 1 FROM {parcel_table} t WHERE t.pin = e.new_pin)
+                       ) AS pin_taken,
+                       COALESCE(NULLIF(concat_ws(', ',
+                           (SELECT string_agg(f.key, ', ')
+                            FROM jsonb_each(e.fields) f
+                            WHERE to_jsonb(a) ->> f.key IS DISTINCT FROM f.value #>> '{{}}'),
+                           CASE WHEN e.new_pin <> e.old_pin THEN 'pin' END
+                       ), ''), 'unknown') AS field_list
+                FROM jsonb_to_recordset(%s::jsonb) AS e(old_pin text, new_pin text, fields jsonb)
+                LEFT JOIN {attr_table} a ON a.pin = e.old_pin
+            ''', (json.dumps(edits, default=str),))
+
+            cur.execute("SELECT old_pin, found FROM _bulk_edit WHERE NOT found OR NOT has_geom")
+            missing = cur.fetchall()
+            if missing:
+                conn.rollback()
+                print(f"❌ {len(missing)} parcels not found.")
+                return {
+                    "status": "error",
+                    "message": "Attribute data or geometry not found for some parcels.",
+                    "missing": [r["old_pin"] for r in missing]
+                }
+
+            cur.execute("SELECT new_pin FROM _bulk_edit WHERE pin_taken")
+            taken = cur.fetchall()
+            if taken:
+                conn.rollback()
+                print(f"❌ {len(taken)} new PINs already in use.")
+                return {
+                    "status": "error",
+                    "message": "Some new PINs are already in use.",
+                    "conflicts": [r["new_pin"] for r in taken]
+                }
+
+            # 2. Log original rows
+            cur.execute(f'''
+                INSERT INTO {log_table} ({log_fields})
+                SELECT %s, 'attr. edit (original)(' || b.field_list || ')', %s, {attr_values}, p.geom
+                FROM _bulk_edit b
+                JOIN {attr_table} a ON a.pin = b.old_pin
+                JOIN {parcel_table} p ON p.pin = b.old_pin
+            ''', (geom_table_name, timestamp))
+            print(f"📝 Logged {cur.rowcount} original versions.")
+
+            # 3. Apply attribute and PIN changes (JSON values cast to column
+            # types) and log the new rows from what the updates return, keyed
+            # by the staged old PIN
+            cur.execute(f'''
+                WITH a AS (
+                    UPDATE {attr_table} a
+                    SET {set_sql}
+                    FROM (
+                        SELECT b.old_pin, b.new_pin, b.fields,
+                               jsonb_populate_record(NULL::{attr_table}, b.fields) AS r
+                        FROM _bulk_edit b
+                    ) n
+                    WHERE a.pin = n.old_pin
+                    RETURNING a.*, n.old_pin AS _old_pin
+                ),
+                p AS (
+                    UPDATE {parcel_table} p
+                    SET pin = b.new_pin
+                    FROM _bulk_edit b
+                    WHERE p.pin = b.old_pin
+                    RETURNING p.geom, b.old_pin AS _old_pin
+                )
+                INSERT INTO {log_table} ({log_fields})
+                SELECT %s, 'attr. edit (new)(' || b.field_list || ')', %s, {attr_values}, p.geom
+                FROM _bulk_edit b
+                JOIN a ON a._old_pin = b.old_pin
+                JOIN p ON p._old_pin = b.old_pin
+            ''', (geom_table_name, timestamp))
+            print(f"🔄 Updated parcels and logged {cur.rowcount} new versions.")
+
+        conn.commit()
+        layer_versions.layer_changed(db, schema, pins=old_pins + new_pins)
+        print("✅ Bulk parcel edit completed.")
+        return {
+            "status": "success",
+            "message": f"{len(edits)} parcels edited and logged successfully.",
+            "count": len(edits)
+        }
+
+    except Exception as e:
+        try:
+            conn.rollback()
+        except:
+            pass
+        print("❌ Error during bulk update:", str(e))
+        return {"status": "error", "message": str(e)}
@@ -0,0 +1,231 @@
+# routes/exports.py
+# Streaming table exports: CSV through COPY ... TO STDOUT, Parquet through
+# Arrow record batches. Memory stays flat regardless of table size.
+import io
+import json
+from decimal import Decimal
+from typing import Iterator, List, Optional, Tuple
+
+import psycopg
+from psycopg import sql
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from routes import catalog
+from routes.layer_utils import STREAM_BATCH_SIZE
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_ARROW = True
+except Exception:
+    HAS_ARROW = False
+
+EXPORT_FORMATS = ("csv", "parquet")
+
+# (column, lowercase LIKE pattern): the substring filters of the search routes
+Filters = List[Tuple[str, str]]
+
+
+def _check_columns(db: Session, schema: str, table: str, filters: Filters) -> List[str]:
+    columns = catalog.table_columns(db, schema, table)
+    if not columns:
+        raise HTTPException(status_code=404, detail=f'Table "{schema}"."{table}" not found')
+    unknown = [field for field, _ in filters if field not in columns]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown filter fields: {', '.join(unknown)}")
+    return columns
+
+
+def _attachment(name: str, extension: str) -> dict:
+    return {"Content-Disposition": f'attachment; filename="{name}.{extension}"'}
+
+
+# ==========================================================
+# 📄 CSV (COPY TO STDOUT)
+# ==========================================================
+def _copy_chunks(engine, query: sql.Composable) -> Iterator[bytes]:
+    """Relay COPY output chunk by chunk on a dedicated psycopg 3 connection."""
+    url = engine.url
+    try:
+        with psycopg.connect(
+            host=url.host, port=url.port, dbname=url.database,
+            user=url.username, password=url.password
+        ) as conn, conn.cursor() as cur:
+            copy_sql = sql.SQL("COPY ({}) TO STDOUT WITH (FORMAT csv, HEADER true)").format(query)
+            with cur.copy(copy_sql) as copy:
+                for chunk in copy:
+                    yield bytes(chunk)
+    except Exception as e:
+        # Headers are already sent: re-raise so the server aborts the
+        # chunked response and the download fails instead of looking complete
+        print(f"❌ CSV export failed: {e}")
+        raise
+
+
+def csv_export(db: Session, schema: str, table: str, filters: Filters) -> StreamingResponse:
+    columns = _check_columns(db, schema, table, filters)
+    types = catalog.column_types(db, schema, table)
+
+    # COPY takes no bind parameters: values are composed as escaped literals.
+    # Geometry is exported as WKT.
+    query = sql.SQL("SELECT {} FROM {}.{} t").format(
+        sql.SQL(", ").join(
+            sql.SQL("ST_AsText(t.{}) AS {}").format(sql.Identifier(c), sql.Identifier(c))
+            if types.get(c) == "geometry" else sql.SQL("t.{}").format(sql.Identifier(c))
+            for c in columns
+        ),
+        sql.Identifier(schema),
+        sql.Identifier(table)
+    )
+    if filters:
+        query = sql.SQL("{} WHERE {}").format(query, sql.SQL(" AND ").join(
+            sql.SQL("LOWER(t.{}::text) LIKE {}").format(sql.Identifier(field), sql.Literal(pattern))
+            for field, pattern in filters
+        ))
+
+    print(f"📤 Streaming CSV export of {schema}.{table}")
+    return StreamingResponse(
+        _copy_chunks(db.get_bind(), query),
+        media_type="text/csv",
+        headers=_attachment(table, "csv")
+    )
+
+
+# ==========================================================
+# 🧱 Parquet (Arrow record batches)
+# ==========================================================
+def _arrow_type(data_type: str):
+    if data_type == "smallint":
+        return pa.int16()
+    if data_type == "integer":
+        return pa.int32()
+    if data_type == "bigint":
+        return pa.int64()
+    if data_type in ("numeric", "double precision"):
+        return pa.float64()
+    if data_type == "real":
+        return pa.float32()
+    if data_type == "boolean":
+        return pa.bool_()
+    if data_type == "date":
+        return pa.date32()
+    if data_type == "timestamp without time zone":
+        return pa.timestamp("us")
+    if data_type == "timestamp with time zone":
+        return pa.timestamp("us", tz="UTC")
+    if data_type in ("geometry", "bytea"):
+        return pa.binary()
+    return pa.string()
+
+
+def _arrow_value(value, arrow_type):
+    if value is None:
+        return None
+    if isinstance(value, Decimal):
+        return float(value)
+    if arrow_type == pa.string() and not isinstance(value, str):
+        # json/jsonb arrive as dict/list: keep them valid JSON, not Python reprs
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, default=str)
+        return str(value)
+    if arrow_type == pa.binary():
+        return bytes(value)
+    return value
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file collecting Parquet output until it is drained."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _parquet_chunks(engine, query, params: dict, schema) -> Iterator[bytes]:
+    sink = _ChunkSink()
+    try:
+        with engine.connect().execution_options(
+            stream_results=True, yield_per=STREAM_BATCH_SIZE
+        ) as conn, pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema) as writer:
+            result = conn.execute(query, params)
+            for rows in result.partitions():
+                arrays = [
+                    pa.array([_arrow_value(row[i], field.type) for row in rows], type=field.type)
+                    for i, field in enumerate(schema)
+                ]
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                data = sink.drain()
+                if data:
+                    yield data
+        # Footer is written when the writer closes
+        yield sink.drain()
+    except Exception as e:
+        print(f"❌ Parquet export failed: {e}")
+        raise
+
+
+def parquet_export(db: Session, schema: str, table: str, filters: Filters) -> StreamingResponse:
+    if not HAS_ARROW:
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+
+    columns = _check_columns(db, schema, table, filters)
+    types = catalog.column_types(db, schema, table)
+    arrow_schema = pa.schema([(c, _arrow_type(types.get(c, "text"))) for c in columns])
+
+    # Geometry is exported as WKB
+    col_sql = ", ".join(
+        f't."{c}"' if types.get(c) != "geometry" else f'ST_AsBinary(t."{c}") AS "{c}"'
+        for c in columns
+    )
+    where_sql = " AND ".join(
+        f'LOWER(t."{field}"::text) LIKE :f{i}' for i, (field, _) in enumerate(filters)
+    ) or "TRUE"
+    params = {f"f{i}": pattern for i, (_, pattern) in enumerate(filters)}
+
+    print(f"📤 Streaming Parquet export of {schema}.{table}")
+    return StreamingResponse(
+        _parquet_chunks(
+            db.get_bind(),
+            text(f'SELECT {col_sql} FROM "{schema}"."{table}" t WHERE {where_sql}'),
+            params,
+            arrow_schema
+        ),
+        media_type="application/vnd.apache.parquet",
+        headers=_attachment(table, "parquet")
+    )
+
+
+def export_table(
+    db: Session,
+    export_format: str,
+    schema: str,
+    table: str,
+    filters: Optional[Filters] = None
+) -> StreamingResponse:
+    if export_format == "csv":
+        return csv_export(db, schema, table, filters or [])
+    if export_format == "parquet":
+        return parquet_export(db, schema, table, filters or [])
+    raise HTTPException(
+        status_code=400,
+        detail=f"Invalid export format '{export_format}'. Expected one of: {', '.join(EXPORT_FORMATS)}"
+    )
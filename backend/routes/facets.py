@@ -0,0 +1,168 @@
+# routes/facets.py
+# Column facets (distinct values + counts), cached until the schema changes.
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from routes import catalog
+
+FACET_MAX_LIMIT = 1000
+
+# Cached facet results kept (least recently used dropped first)
+FACET_CACHE_SIZE = int(os.getenv("FACET_CACHE_SIZE", "512"))
+
+# Entries are recomputed after this many seconds (changes made outside the app)
+FACET_CACHE_MAX_AGE = int(os.getenv("FACET_CACHE_MAX_AGE", "3600"))
+
+TEXT_TYPES = ("text", "character varying", "character")
+
+_lock = threading.Lock()
+
+# (db_key, schema, table, column, prefix, limit, sort) -> (computed_at, result)
+_cache: "OrderedDict[Tuple, Tuple[float, Dict]]" = OrderedDict()
+
+
+def invalidate(db_key: str, schema: str):
+    """Drop cached facets of a schema (called from layer_versions.layer_changed)."""
+    with _lock:
+        for key in [k for k in _cache if k[0] == db_key and k[1] == schema]:
+            del _cache[key]
+
+
+def _leading_index(db: Session, schema: str, table: str, column: str) -> Tuple[bool, bool]:
+    """
+    (indexed, c_ordered): whether a btree index starts with this column
+    (loose index scan possible), and whether the column sorts in C
+    collation, where all values sharing a prefix are adjacent.
+    """
+    row = db.execute(text("""
+        SELECT count(*) > 0,
+               coalesce(bool_or(
+                   coll.collname IN ('C', 'POSIX')
+                   OR (coll.collname = 'default' AND d.datcollate IN ('C', 'POSIX'))
+               ), false)
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        JOIN pg_am am ON am.oid = c.relam
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+        LEFT JOIN pg_collation coll ON coll.oid = a.attcollation
+        JOIN pg_database d ON d.datname = current_database()
+        WHERE i.indrelid = to_regclass(:rel)
+          AND a.attname = :column
+          AND am.amname = 'btree'
+    """), {"rel": f'"{schema}"."{table}"', "column": column}).fetchone()
+    return bool(row[0]), bool(row[1])
+
+
+def _loose_scan_sql(schema: str, table: str, column: str, prefix: bool) -> str:
+    """
+    Distinct values in order by hopping through the index one value at a
+    time (recursive CTE), with a per-value count served by the same index.
+    Stops after :limit values or when leaving the prefix range; the prefix
+    variant is only correct on a C-collated index (see column_facets).
+    """
+    col = f't."{column}"'
+    start = f"AND {col} >= :prefix" if prefix else ""
+    keep = "AND starts_with(v.value::text, :prefix)" if prefix else ""
+    return f'''
+        WITH RECURSIVE v AS (
+            (SELECT {col} AS value, 1 AS n
+             FROM "{schema}"."{table}" t
+             WHERE {col} IS NOT NULL {start}
+             ORDER BY {col} LIMIT 1)
+            UNION ALL
+            SELECT (SELECT {col}
+                    FROM "{schema}"."{table}" t
+                    WHERE {col} > v.value
+                    ORDER BY {col} LIMIT 1), v.n + 1
+            FROM v
+            WHERE v.value IS NOT NULL AND v.n <= :limit {keep}
+        )
+        SELECT v.value,
+               (SELECT count(*) FROM "{schema}"."{table}" t WHERE {col} = v.value) AS count
+        FROM v
+        WHERE v.value IS NOT NULL {keep}
+        ORDER BY v.value
+        LIMIT :limit
+    '''
+
+
+def _group_sql(schema: str, table: str, column: str, prefix: bool, sort: str) -> str:
+    col = f't."{column}"'
+    where = f"AND starts_with({col}::text, :prefix)" if prefix else ""
+    order = "count DESC, value" if sort == "count" else "value"
+    return f'''
+        SELECT {col} AS value, count(*) AS count
+        FROM "{schema}"."{table}" t
+        WHERE {col} IS NOT NULL {where}
+        GROUP BY {col}
+        ORDER BY {order}
+        LIMIT :limit
+    '''
+
+
+def column_facets(
+    db: Session,
+    schema: str,
+    table: str,
+    column: str,
+    limit: int = 100,
+    prefix: Optional[str] = None,
+    sort: str = "value"
+) -> Dict:
+    """
+    Up to `limit` distinct values of a column with their row counts.
+    sort=value uses a loose index scan when a btree index leads with the
+    column; sort=count always aggregates the whole column.
+    """
+    types = catalog.column_types(db, schema, table)
+    if column not in types:
+        raise HTTPException(status_code=404, detail=f'Column "{column}" not found in "{schema}"."{table}"')
+    if sort not in ("value", "count"):
+        raise HTTPException(status_code=400, detail="sort must be 'value' or 'count'")
+    if limit < 1 or limit > FACET_MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {FACET_MAX_LIMIT}")
+    if types[column] == "geometry":
+        raise HTTPException(status_code=400, detail="Geometry columns cannot be faceted")
+
+    key = (catalog.db_key(db), schema, table, column, prefix or "", limit, sort)
+    with _lock:
+        entry = _cache.get(key)
+        if entry and time.time() - entry[0] < FACET_CACHE_MAX_AGE:
+            _cache.move_to_end(key)
+            return entry[1]
+
+    # With a prefix the walk stops at the first non-matching value, which is
+    # only right when prefixed values are contiguous: text under C collation.
+    # Under linguistic collations ("Ab" < "aba" < "Abc") fall back to GROUP BY.
+    loose = False
+    if sort == "value":
+        indexed, c_ordered = _leading_index(db, schema, table, column)
+        loose = indexed and (not prefix or (types[column] in TEXT_TYPES and c_ordered))
+    sql = _loose_scan_sql(schema, table, column, bool(prefix)) if loose \
+        else _group_sql(schema, table, column, bool(prefix), sort)
+
+    params = {"limit": limit + 1}
+    if prefix:
+        params["prefix"] = prefix
+    rows = db.execute(text(sql), params).fetchall()
+
+    result = {
+        "status": "success",
+        "data": [{"value": value, "count": count} for value, count in rows[:limit]],
+        "has_more": len(rows) > limit,
+        "strategy": "loose_index_scan" if loose else "group_by",
+    }
+
+    with _lock:
+        _cache[key] = (time.time(), result)
+        _cache.move_to_end(key)
+        while len(_cache) > FACET_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
@@ -1,19 +1,83 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from auth.dependencies import get_current_user, get_user_main_db
 from auth.models import User
-from auth.access_control import AccessControl
+from routes import binary_formats, catalog, layer_cache, layer_versions
+from routes.layer_utils import (
+    validate_user_schemas,
+    list_parcel_tables,
+    list_layer_columns,
+    stream_feature_collection,
+    feature_collection_sql,
+    check_layer_mode,
+    check_layer_format,
+    layer_filter_sql,
+    layer_variant,
+    geojson_sql,
+)
+from routes.topojson_utils import to_topology
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from typing import List
+from typing import List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import os
 
 router = APIRouter()
 
+# Max concurrent per-table queries for /all-barangays across all requests
+# (each uses its own pooled connection, so keep this well below the engine
+# pool size: 5 + 10 overflow by default)
+ALL_BARANGAYS_WORKERS = int(os.getenv("ALL_BARANGAYS_WORKERS", "4"))
+
+# Shared by every request so concurrent loads queue instead of each opening
+# its own set of connections
+_fetch_pool = ThreadPoolExecutor(max_workers=ALL_BARANGAYS_WORKERS, thread_name_prefix="all-barangays")
+
+
+def _fetch_parcel_features(engine, schema: str, table: str, sql, params: dict) -> Tuple[list, bool]:
+    """
+    Run one parcel table query on its own connection and build its features.
+    Returns (features, ok); ok is False when the query failed.
+    """
+    features = []
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+
+        for row in rows:
+            geom = row[1]
+            if not geom:
+                continue
+
+            features.append({
+                "type": "Feature",
+                "geometry": geom,
+                "properties": {
+                    "pin": row[0],
+                    "source_schema": schema,
+                    "source_table": table
+                }
+            })
+
+    except Exception as e:
+        print(f"⚠️ Query failed on {schema}.{table}: {e}")
+        return features, False
+
+    return features, True
+
+
 # ==========================================================
 # 🗺️ Load all parcel/road features from selected schemas
 # ==========================================================
 @router.get("/all-barangays")
 def get_all_geom_tables(
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
     schemas: List[str] = Query(...),
+    mode: str = Query("default", description="default | stream"),
+    bbox: Optional[str] = Query(None, description="minx,miny,maxx,maxy (EPSG:4326)"),
+    zoom: Optional[float] = Query(None, description="Map zoom, used to simplify geometry"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_user_main_db)
 ):
@@ -21,160 +85,242 @@ def get_all_geom_tables(
     Loads all parcel-like tables (with geom + pin) from the given schemas,
     excluding system and analysis tables such as transaction logs, JoinedTable,
     CAMA-Table, and RunSavedModel results.
+    With mode=stream the FeatureCollection is written incrementally.
+    Optional bbox/zoom restrict features to the view and simplify geometry.
+    Answers If-None-Match with 304 while no edit happened in the schemas.
+    Full (unfiltered) collections are served from the on-disk gzip snapshot
+    cache when the client accepts gzip.
     """
+    check_layer_mode(mode, ("default", "stream"))
+    geom_sql, where_sql, filter_params = layer_filter_sql(bbox, zoom)
 
-    # ✅ Verify user access
-    access_info = AccessControl.check_user_access(current_user)
-    if access_info["status"] == "pending_approval":
-        raise HTTPException(status_code=403, detail=access_info["message"])
-
-    # ✅ Validate which schemas user can access
-    invalid_schemas = []
-    valid_schemas = []
-    for schema in schemas:
-        if AccessControl.validate_schema_access(schema, current_user):
-            valid_schemas.append(schema)
-        else:
-            invalid_schemas.append(schema)
-
-    if invalid_schemas:
-        raise HTTPException(
-            status_code=403,
-            detail=f"Access denied to schemas: {', '.join(invalid_schemas)}"
-        )
-    if not valid_schemas:
-        raise HTTPException(status_code=403, detail="No valid schemas to query")
+    # ✅ Verify user access and validate which schemas user can access
+    valid_schemas = validate_user_schemas(schemas, current_user)
+
+    # ✅ Conditional GET keyed on the schemas' edit activity
+    etag, not_modified = layer_versions.check_not_modified(request, db, valid_schemas)
+    if not_modified:
+        return not_modified
+    response.headers.update(layer_versions.etag_headers(etag))
+
+    # ✅ Serve the full collection from the snapshot cache when possible
+    #    (default mode only, so a snapshot is never served to another mode)
+    cacheable = mode == "default" and bbox is None and zoom is None and \
+        layer_cache.accepts_gzip(request.headers.get("accept-encoding"))
+    if cacheable:
+        cached = layer_cache.lookup(db, "all-barangays", valid_schemas)
+        if cached:
+            return layer_cache.cached_response(cached, layer_versions.etag_headers(etag))
+        generation = layer_cache.generations(db, valid_schemas)
 
     all_features = []
+    stream_layers = []
+    table_queries = []
+    # Any skipped schema/table makes the collection partial: never snapshot it
+    complete = True
 
     # ✅ Query tables within each valid schema
     for schema in valid_schemas:
         try:
-            # -- Find all tables with both geom + pin columns,
-            #    excluding unwanted system/analysis tables --
-            result = db.execute(
-                text("""
-                    SELECT table_name
-                    FROM information_schema.columns
-                    WHERE table_schema = :schema
-                      AND column_name IN ('geom', 'pin')
-                      AND table_name NOT ILIKE :pattern1
-                      AND table_name NOT ILIKE :pattern2
-                      AND table_name NOT ILIKE :pattern3
-                      AND table_name NOT ILIKE :pattern4
-                      AND table_name NOT ILIKE :pattern5
-                    GROUP BY table_name
-                    HAVING COUNT(DISTINCT column_name) = 2
-                """),
-                {
-                    "schema": schema,
-                    "pattern1": "%transaction_log%",
-                    "pattern2": "%JoinedTable%",
-                    "pattern3": "%CAMA-Table%",
-                    "pattern4": "%RunSavedModel1%",
-                    "pattern5": "%RunSavedModel2%"
-                }
-            )
-            tables = [row[0] for row in result]
+            tables = list_parcel_tables(db, schema)
         except Exception as e:
             print(f"❌ Error listing tables in schema '{schema}': {e}")
+            complete = False
             continue
 
-        # ✅ Build and execute queries per table
+        # ✅ Build queries per table
         for table in tables:
             try:
                 # Retrieve all columns except geom
-                result = db.execute(
-                    text("""
-                        SELECT column_name
-                        FROM information_schema.columns
-                        WHERE table_schema = :schema
-                          AND table_name = :table
-                          AND column_name != 'geom'
-                    """),
-                    {"schema": schema, "table": table}
-                )
-                columns = [row[0] for row in result]
+                columns = list_layer_columns(db, schema, table)
             except Exception as e:
                 print(f"❌ Failed to read columns from {schema}.{table}: {e}")
+                complete = False
                 continue
 
             if not columns:
                 continue
 
+            if mode == "stream":
+                stream_layers.append((
+                    text(f'''
+                        SELECT t."pin", ST_AsGeoJSON({geom_sql}) AS geometry
+                        FROM "{schema}"."{table}" t
+                        WHERE {where_sql}
+                    '''),
+                    filter_params,
+                    {"source_schema": schema, "source_table": table}
+                ))
+                continue
+
             # Build query for features (pin + geometry only)
             sql = text(f'''
-                SELECT t."pin", ST_AsGeoJSON(t.geom)::json AS geometry
+                SELECT t."pin", ST_AsGeoJSON({geom_sql})::json AS geometry
                 FROM "{schema}"."{table}" t
+                WHERE {where_sql}
             ''')
+            table_queries.append((schema, table, sql))
 
-            try:
-                result = db.execute(sql)
-                rows = result.fetchall()
-
-                for row in rows:
-                    geom = row[1]
-                    if not geom:
-                        continue
-
-                    all_features.append({
-                        "type": "Feature",
-                        "geometry": geom,
-                        "properties": {
-                            "pin": row[0],
-                            "source_schema": schema,
-                            "source_table": table
-                        }
-                    })
+    if mode == "stream":
+        return StreamingResponse(
+            stream_feature_collection(db.get_bind(), stream_layers),
+            media_type="application/json",
+            headers=layer_versions.etag_headers(etag)
+        )
 
-            except Exception as e:
-                print(f"⚠️ Query failed on {schema}.{table}: {e}")
-                continue
+    # ✅ Run the per-table queries concurrently on separate pooled
+    #    connections (shared bounded pool); map() keeps the results in
+    #    schema/table order
+    engine = db.get_bind()
+    if table_queries:
+        results = _fetch_pool.map(
+            lambda q: _fetch_parcel_features(engine, *q, filter_params),
+            table_queries
+        )
+        for features, ok in results:
+            all_features.extend(features)
+            complete = complete and ok
 
-    return {
+    collection = {
         "type": "FeatureCollection",
         "features": all_features
     }
 
+    if cacheable and complete:
+        background_tasks.add_task(
+            layer_cache.store, catalog.db_key(db), "all-barangays",
+            valid_schemas, None, "", collection, generation
+        )
+
+    return collection
+
 
 # ==========================================================
 # 📦 Load features from a single table (Landmarks, Roads, Parcels, etc.)
 # ==========================================================
 @router.get("/single-table")
 def get_single_table(
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
     schema: str,
     table: str,
+    mode: str = Query("default", description="default | stream | postgis"),
+    bbox: Optional[str] = Query(None, description="minx,miny,maxx,maxy (EPSG:4326)"),
+    zoom: Optional[float] = Query(None, description="Map zoom, used to simplify geometry"),
+    precision: Optional[int] = Query(None, ge=0, le=15, description="Max decimal digits of coordinates"),
+    layer_format: str = Query("geojson", alias="format", description="geojson | topojson | fgb | arrow"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_user_main_db)
 ):
     """
     Loads all features from a single specified table (e.g., Landmarks, Roads, Parcels).
+    With mode=stream the FeatureCollection is written incrementally;
+    with mode=postgis Postgres builds the whole FeatureCollection text.
+    Optional bbox/zoom restrict features to the view and simplify geometry,
+    precision limits coordinate digits and format=topojson returns a
+    quantized Topology with shared arcs; format=fgb (FlatGeobuf) and
+    format=arrow (Arrow IPC stream, GeoArrow geometry) return binary bodies.
+    Answers If-None-Match with 304 while no edit happened in the schema.
+    Full (unfiltered) collections are served from the on-disk gzip snapshot
+    cache when the client accepts gzip.
     """
+    check_layer_mode(mode)
+    check_layer_format(layer_format, mode)
+    geom_sql, where_sql, filter_params = layer_filter_sql(bbox, zoom)
+    variant = layer_variant(layer_format, precision, mode)
+
+    # ✅ Conditional GET keyed on the schema's edit activity
+    etag, not_modified = layer_versions.check_not_modified(request, db, [schema])
+    if not_modified:
+        return not_modified
+    response.headers.update(layer_versions.etag_headers(etag))
+
+    # ✅ Serve the full collection from the snapshot cache when possible
+    cacheable = bbox is None and zoom is None and \
+        layer_format not in binary_formats.BINARY_FORMATS and \
+        layer_cache.accepts_gzip(request.headers.get("accept-encoding"))
+    if cacheable:
+        cached = layer_cache.lookup(db, "single-table", [schema], table, variant)
+        if cached:
+            return layer_cache.cached_response(cached, layer_versions.etag_headers(etag))
+        generation = layer_cache.generations(db, [schema])
+
     try:
         # ✅ Get all non-geometry columns
-        result = db.execute(
-            text("""
-                SELECT column_name
-                FROM information_schema.columns
-                WHERE table_schema = :schema
-                  AND table_name = :table
-                  AND column_name != 'geom'
-            """),
-            {"schema": schema, "table": table}
-        )
-        columns = [row[0] for row in result]
+        columns = list_layer_columns(db, schema, table)
 
         if not columns:
             return {"type": "FeatureCollection", "features": []}
 
         # ✅ Build query to fetch all data + geometry
         col_sql = ", ".join(f't."{col}"' for col in columns)
+
+        if mode == "stream":
+            sql = text(f'''
+                SELECT {col_sql}, {geojson_sql(geom_sql, precision)} AS geometry
+                FROM "{schema}"."{table}" t
+                WHERE {where_sql}
+            ''')
+            return StreamingResponse(
+                stream_feature_collection(
+                    db.get_bind(),
+                    [(sql, filter_params, {"source_table": table, "source_schema": schema})]
+                ),
+                media_type="application/json",
+                headers=layer_versions.etag_headers(etag)
+            )
+
+        if mode == "postgis":
+            sql = text(feature_collection_sql(
+                from_sql=f'"{schema}"."{table}" t',
+                properties_sql="to_jsonb(t) - 'geom' || jsonb_build_object("
+                               "'source_table', CAST(:table AS text), "
+                               "'source_schema', CAST(:schema AS text))",
+                geom_sql=geom_sql,
+                where_sql=where_sql,
+                precision=precision
+            ))
+            collection = db.execute(
+                sql, {"schema": schema, "table": table, **filter_params}
+            ).scalar()
+            if cacheable:
+                background_tasks.add_task(
+                    layer_cache.store, catalog.db_key(db), "single-table",
+                    [schema], table, variant, collection, generation
+                )
+            return Response(
+                content=collection,
+                media_type="application/json",
+                headers=layer_versions.etag_headers(etag)
+            )
+
+        if layer_format in binary_formats.BINARY_FORMATS:
+            # ✅ Encode the whole result in bulk (no per-feature dicts)
+            frame = binary_formats.read_frame(
+                db,
+                f'''
+                    SELECT {col_sql}, {geom_sql} AS geom
+                    FROM "{schema}"."{table}" t
+                    WHERE {where_sql} AND {geom_sql} IS NOT NULL
+                ''',
+                filter_params,
+                geom_col="geom"
+            )
+            frame["source_table"] = table
+            frame["source_schema"] = schema
+            return binary_formats.binary_response(
+                binary_formats.encode_frame(frame, layer_format, table),
+                layer_format, table, layer_versions.etag_headers(etag)
+            )
+
         sql = text(f'''
-            SELECT {col_sql}, ST_AsGeoJSON(t.geom)::json AS geometry
+            SELECT {col_sql}, {geojson_sql(geom_sql, precision)}::json AS geometry
             FROM "{schema}"."{table}" t
+            WHERE {where_sql}
         ''')
 
-        result = db.execute(sql)
+        result = db.execute(sql, filter_params)
         rows = result.fetchall()
 
         features = []
@@ -193,8 +339,21 @@ def get_single_table(
                 "properties": row_dict
             })
 
-        return {"type": "FeatureCollection", "features": features}
+        collection = {"type": "FeatureCollection", "features": features}
+
+        if layer_format == "topojson":
+            collection = to_topology({table: collection})
+
+        if cacheable:
+            background_tasks.add_task(
+                layer_cache.store, catalog.db_key(db), "single-table",
+                [schema], table, variant, collection, generation
+            )
+
+        return collection
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error loading single table {schema}.{table}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,15 +1,24 @@
-from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi import APIRouter, HTTPException, Depends, Request, Query, Response
 from sqlalchemy.orm import Session
 from psycopg2.extras import RealDictCursor
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any
 import json
+import os
 
 from auth.dependencies import get_user_main_db, get_current_user
 from auth.models import User
+from routes import boundary_cache, layer_versions
+from routes.layer_utils import feature_collection_sql, check_layer_mode, parse_bbox
 
 router = APIRouter()
 
+# Below this zoom landmarks are returned as grid clusters
+LANDMARK_CLUSTER_MAX_ZOOM = float(os.getenv("LANDMARK_CLUSTER_MAX_ZOOM", "15"))
+
+# Cluster grid cell size in screen pixels
+LANDMARK_CLUSTER_CELL_PX = 60
+
 
 # ============================================================
 # 📦 Pydantic Models
@@ -48,20 +57,69 @@ class BarangayQuery(BaseModel):
 
 @router.get("/landmarks/{schema}")
 async def get_landmarks(
+    request: Request,
+    response: Response,
     schema: str,
+    mode: str = Query("default", description="default | postgis"),
+    bbox: Optional[str] = Query(None, description="minx,miny,maxx,maxy (EPSG:4326)"),
+    zoom: Optional[float] = Query(None, description="Map zoom; below the cluster zoom points are clustered"),
     db: Session = Depends(get_user_main_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Fetch all landmarks for a given schema."""
+    """
+    Fetch all landmarks for a given schema.
+    With mode=postgis the FeatureCollection is built as text by Postgres.
+    Optional bbox restricts landmarks to the view. With zoom below
+    LANDMARK_CLUSTER_MAX_ZOOM, grid clusters are returned instead of points
+    (properties: cluster, count, types = count per landmark type).
+    Answers If-None-Match with 304 while no landmark change was recorded.
+    """
+    check_layer_mode(mode, ("default", "postgis"))
+    bounds = parse_bbox(bbox)
     print(f"🔍 Fetching landmarks for schema={schema} by user={current_user.user_name}")
+
+    etag, not_modified = layer_versions.check_not_modified(request, db, [schema])
+    if not_modified:
+        return not_modified
+    response.headers.update(layer_versions.etag_headers(etag))
+
+    where_sql, params = "TRUE", {}
+    if bounds:
+        where_sql = "t.geom && ST_MakeEnvelope(%(xmin)s, %(ymin)s, %(xmax)s, %(ymax)s, 4326)"
+        params = dict(zip(("xmin", "ymin", "xmax", "ymax"), bounds))
+
     conn = db.connection().connection
 
     try:
+        if zoom is not None and zoom < LANDMARK_CLUSTER_MAX_ZOOM:
+            features = _landmark_clusters(conn, schema, where_sql, params, zoom)
+            print(f"✅ Returned {len(features)} landmark clusters from {schema} (zoom {zoom})")
+            return {"type": "FeatureCollection", "features": features}
+
+        if mode == "postgis":
+            with conn.cursor() as cur:
+                cur.execute(feature_collection_sql(
+                    from_sql=f'"{schema}"."Landmarks" t',
+                    properties_sql="json_build_object("
+                                   "'id', t.id, 'name', t.name, 'type', t.type, "
+                                   "'barangay', t.barangay, 'descr', t.descr)",
+                    where_sql=where_sql
+                ), params)
+                collection = cur.fetchone()[0]
+
+            print(f"✅ Returned PostGIS-built landmark collection from {schema}")
+            return Response(
+                content=collection,
+                media_type="application/json",
+                headers=layer_versions.etag_headers(etag)
+            )
+
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute(f'''
                 SELECT id, name, type, barangay, descr, ST_AsGeoJSON(geom)::json AS geometry
-                FROM "{schema}"."Landmarks"
-            ''')
+                FROM "{schema}"."Landmarks" t
+                WHERE {where_sql}
+            ''', params)
             rows = cur.fetchall()
 
         features = [
@@ -87,6 +145,54 @@ async def get_landmarks(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _landmark_clusters(conn, schema: str, where_sql: str, params: dict, zoom: float) -> list:
+    """
+    Snap landmarks to a grid of LANDMARK_CLUSTER_CELL_PX pixels at this zoom
+    and return one point per occupied cell (centroid of its landmarks).
+    Cells holding a single landmark return the landmark itself.
+    """
+    cell = LANDMARK_CLUSTER_CELL_PX * 360.0 / (256 * 2 ** max(zoom, 0))
+
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(f'''
+            WITH points AS (
+                SELECT
+                    ST_SnapToGrid(t.geom, %(cell)s) AS cell,
+                    t.geom,
+                    COALESCE(t.type, '') AS type,
+                    json_build_object(
+                        'id', t.id, 'name', t.name, 'type', t.type,
+                        'barangay', t.barangay, 'descr', t.descr
+                    ) AS props
+                FROM "{schema}"."Landmarks" t
+                WHERE {where_sql} AND t.geom IS NOT NULL
+            ),
+            per_type AS (
+                SELECT cell, type, count(*) AS n, ST_Collect(geom) AS geom,
+                       (array_agg(props))[1] AS props
+                FROM points
+                GROUP BY cell, type
+            )
+            SELECT
+                ST_AsGeoJSON(ST_Centroid(ST_Collect(geom)))::json AS geometry,
+                sum(n)::int AS count,
+                json_object_agg(type, n) AS types,
+                (array_agg(props))[1] AS props
+            FROM per_type
+            GROUP BY cell
+        ''', {**params, "cell": cell})
+        rows = cur.fetchall()
+
+    features = []
+    for row in rows:
+        if row["count"] == 1:
+            properties = row["props"]
+        else:
+            properties = {"cluster": True, "count": row["count"], "types": row["types"]}
+        features.append({"type": "Feature", "geometry": row["geometry"], "properties": properties})
+    return features
+
+
 # ============================================================
 # ➕ 2. INSERT LANDMARK
 # ============================================================
@@ -119,6 +225,7 @@ async def insert_landmark(
             )
             row = cur.fetchone()
             conn.commit()
+        layer_versions.layer_changed(db, body.db_schema, pins=[])
 
         new_id = row["id"] if row else None
         print(f"✅ Inserted landmark id={new_id} by {current_user.user_name}")
@@ -164,6 +271,7 @@ async def update_landmark(
         with conn.cursor() as cur:
             cur.execute(sql, values)
             conn.commit()
+        layer_versions.layer_changed(db, body.db_schema, pins=[])
 
         print(f"✅ Updated landmark id={body.id} by {current_user.user_name}")
         return {"status": "success", "updated_id": body.id}
@@ -198,6 +306,7 @@ async def remove_landmarks(
                 (body.ids,),
             )
             conn.commit()
+        layer_versions.layer_changed(db, body.db_schema, pins=[])
 
         print(f"✅ Removed landmarks {body.ids} by {current_user.user_name}")
         return {"status": "success", "removed_ids": body.ids}
@@ -218,8 +327,23 @@ async def find_barangay(
     db: Session = Depends(get_user_main_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Find which barangay boundary polygon contains a given lat/lng point."""
+    """
+    Find which barangay boundary polygon contains a given lat/lng point.
+    Uses the cached generalized boundaries; points they cannot decide
+    (outside every barangay, or within the simplification tolerance of an
+    edge) are checked with ST_Contains on the full geometry.
+    """
     print(f"📍 Find barangay request by {current_user.user_name} in schema={body.db_schema} at lat={body.lat}, lng={body.lng}")
+
+    try:
+        boundaries = boundary_cache.boundary_set(db, body.db_schema)
+        barangay = boundaries.find_barangay(float(body.lng), float(body.lat))
+        if barangay is not None:
+            print(f"✅ Found barangay '{barangay}' (cached boundaries) for user={current_user.user_name}")
+            return {"barangay": barangay}
+    except Exception as e:
+        print(f"⚠️ Cached barangay lookup unavailable, querying PostGIS: {e}")
+
     conn = db.connection().connection
 
     try:
@@ -0,0 +1,170 @@
+# routes/layer_cache.py
+# On-disk gzip snapshots of serialized layer responses, invalidated by edits.
+#
+# Layout under LAYER_CACHE_DIR:
+#   <db>/entries/<hash>.json.gz   cached response body
+#   <db>/schemas/<schema>/<hash>  marker: entry depends on this schema
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from routes import catalog
+from routes.layer_utils import json_default
+
+LAYER_CACHE_DIR = os.getenv(
+    "LAYER_CACHE_DIR", os.path.join(tempfile.gettempdir(), "layer_cache")
+)
+LAYER_CACHE_ENABLED = os.getenv("LAYER_CACHE_ENABLED", "1") != "0"
+
+# Snapshots older than this are ignored, so changes made outside the app
+# are picked up (matches the ETag roll-over in layer_versions).
+LAYER_CACHE_MAX_AGE = int(os.getenv("LAYER_CACHE_MAX_AGE", "3600"))
+
+_lock = threading.Lock()
+
+# (db_key, schema) -> invalidation count; a snapshot computed before an
+# invalidation must not be stored after it
+_generations: Dict[Tuple[str, str], int] = {}
+
+
+def _safe(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+
+
+def _db_dir(key: str) -> str:
+    return os.path.join(LAYER_CACHE_DIR, _safe(key))
+
+
+def _entry_name(endpoint: str, schemas: List[str], table: Optional[str], variant: str) -> str:
+    raw = "|".join([endpoint, ",".join(schemas), table or "", variant])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    return "gzip" in (accept_encoding or "").lower()
+
+
+def generations(db: Session, schemas: List[str]) -> Tuple[int, ...]:
+    """Snapshot of invalidation counters, taken before building a response."""
+    key = catalog.db_key(db)
+    return tuple(_generations.get((key, s), 0) for s in schemas)
+
+
+def cached_response(path: str, headers: Optional[Dict[str, str]] = None) -> FileResponse:
+    """Serve a snapshot file as-is with Content-Encoding: gzip."""
+    return FileResponse(
+        path,
+        media_type="application/json",
+        headers={
+            **(headers or {}),
+            "Content-Encoding": "gzip",
+            "Vary": "Accept-Encoding",
+        }
+    )
+
+
+def lookup(
+    db: Session,
+    endpoint: str,
+    schemas: List[str],
+    table: Optional[str] = None,
+    variant: str = ""
+) -> Optional[str]:
+    """Path of a fresh cached snapshot, or None."""
+    if not LAYER_CACHE_ENABLED:
+        return None
+
+    path = os.path.join(
+        _db_dir(catalog.db_key(db)), "entries",
+        _entry_name(endpoint, schemas, table, variant) + ".json.gz"
+    )
+    try:
+        if time.time() - os.path.getmtime(path) < LAYER_CACHE_MAX_AGE:
+            return path
+    except OSError:
+        pass
+    return None
+
+
+def store(
+    key: str,
+    endpoint: str,
+    schemas: List[str],
+    table: Optional[str],
+    variant: str,
+    body,
+    generation: Tuple[int, ...]
+):
+    """
+    Compress and write a snapshot (meant to run as a background task).
+    `body` is the serialized response (bytes/str) or a JSON-able payload.
+    Skipped if one of the schemas was invalidated since `generation`.
+    """
+    if not LAYER_CACHE_ENABLED:
+        return
+
+    if tuple(_generations.get((key, s), 0) for s in schemas) != generation:
+        return
+
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    elif not isinstance(body, bytes):
+        body = json.dumps(body, default=json_default, separators=(",", ":")).encode("utf-8")
+
+    name = _entry_name(endpoint, schemas, table, variant)
+    db_dir = _db_dir(key)
+    entries_dir = os.path.join(db_dir, "entries")
+
+    try:
+        os.makedirs(entries_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=entries_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) as gz:
+            gz.write(body)
+
+        with _lock:
+            if tuple(_generations.get((key, s), 0) for s in schemas) != generation:
+                os.remove(tmp_path)
+                return
+            for schema in schemas:
+                marker_dir = os.path.join(db_dir, "schemas", _safe(schema))
+                os.makedirs(marker_dir, exist_ok=True)
+                open(os.path.join(marker_dir, name), "w").close()
+            os.replace(tmp_path, os.path.join(entries_dir, name + ".json.gz"))
+
+        print(f"💾 Cached {endpoint} snapshot for {schemas} ({len(body)} bytes raw)")
+    except Exception as e:
+        print(f"⚠️ Failed to write layer cache for {endpoint} {schemas}: {e}")
+
+
+def invalidate(db_or_key, schema: str):
+    """Remove every snapshot that includes data from this schema."""
+    key = db_or_key if isinstance(db_or_key, str) else catalog.db_key(db_or_key)
+    db_dir = _db_dir(key)
+    marker_dir = os.path.join(db_dir, "schemas", _safe(schema))
+
+    with _lock:
+        _generations[(key, schema)] = _generations.get((key, schema), 0) + 1
+
+        try:
+            names = os.listdir(marker_dir)
+        except OSError:
+            return
+
+        for name in names:
+            for path in (
+                os.path.join(db_dir, "entries", name + ".json.gz"),
+                os.path.join(marker_dir, name),
+            ):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
@@ -0,0 +1,232 @@
+# routes/layer_changes.py
+# Incremental parcel layer updates: delta endpoint + server-sent events.
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from auth.dependencies import get_current_user, get_user_main_db
+from auth.models import User
+from routes import catalog, layer_events
+from routes.layer_utils import list_parcel_tables, validate_user_schemas
+
+router = APIRouter()
+
+# Above this many touched parcels the client is told to reload instead
+CHANGES_MAX_PINS = int(os.getenv("CHANGES_MAX_PINS", "5000"))
+
+# Seconds between SSE keep-alive comments (proxies drop idle streams)
+EVENTS_KEEPALIVE_SECONDS = 25
+
+# Longest expected edit transaction. transaction_date is taken in Python
+# before commit, so /changes re-reads this much log before the token time.
+CHANGES_OVERLAP_SECONDS = int(os.getenv("CHANGES_OVERLAP_SECONDS", "600"))
+
+CHANGE_LOG_INDEX = "parcel_transaction_log_transaction_date_idx"
+
+
+def _current_token(db: Session) -> str:
+    """
+    Version token "<xid>-<time>": the oldest transaction id still running
+    (snapshot xmin) and the app clock (same clock as transaction_date).
+    Every transaction below the xid has finished, so a row not visible at
+    this point was written by a transaction with an id >= the xid, whatever
+    its commit order or timestamp. The time only narrows the log range
+    that has to be read.
+    """
+    xid = db.execute(text(
+        "SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint"
+    )).scalar()
+    return f"{xid}-{int(datetime.now().timestamp())}"
+
+
+def _parse_token(token: Optional[str]) -> Optional[Tuple[int, datetime]]:
+    """(xid, time) or None for missing / older-format tokens."""
+    parts = (token or "").split("-")
+    if len(parts) != 2 or not all(p.isdigit() for p in parts):
+        return None
+    return int(parts[0]), datetime.fromtimestamp(int(parts[1]))
+
+
+def ensure_change_log_index(engine, schema: str) -> str:
+    """
+    btree index on parcel_transaction_log.transaction_date, used by the
+    /changes range filter (admin step; CONCURRENTLY, rebuilt if INVALID).
+    Returns "ok" or the error message.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        try:
+            invalid = conn.execute(text("""
+                SELECT NOT i.indisvalid FROM pg_index i
+                WHERE i.indexrelid = to_regclass(:index)
+            """), {"index": f'"{schema}"."{CHANGE_LOG_INDEX}"'}).scalar()
+            if invalid:
+                conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{schema}"."{CHANGE_LOG_INDEX}"'))
+            conn.execute(text(f'''
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS "{CHANGE_LOG_INDEX}"
+                ON "{schema}"."parcel_transaction_log" (transaction_date)
+            '''))
+        except Exception as e:
+            print(f"⚠️ Change log index on {schema} failed: {e}")
+            return str(e)
+    print(f"🔎 Change log index ready on {schema}")
+    return "ok"
+
+
+# ==========================================================
+# 🔄 Changes since a version
+# ==========================================================
+@router.get("/layers/{schema}/changes")
+def get_layer_changes(
+    schema: str,
+    since: Optional[str] = Query(None, description="Token from a previous response"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_user_main_db)
+):
+    """
+    Parcels added, removed or changed since `since`, derived from
+    parcel_transaction_log. Without `since` (or when too much changed)
+    the response only carries the current token and full_reload = true:
+    load /all-barangays once, then poll with the returned token.
+    Features have the same shape as /all-barangays features.
+    """
+    validate_user_schemas([schema], current_user)
+
+    if not catalog.table_exists(db, schema, "parcel_transaction_log"):
+        raise HTTPException(status_code=404, detail=f"No parcel_transaction_log in schema '{schema}'")
+
+    try:
+        token = _current_token(db)
+        parsed = _parse_token(since)
+        # Missing or older-format tokens: start over from a full load
+        if parsed is None:
+            return {"status": "success", "token": token, "full_reload": True}
+        since_xid, since_time = parsed
+
+        # transaction_date (indexed, see ensure_change_log_index) limits the
+        # rows read; the xmin test then decides. Rows carry 32-bit xmin;
+        # widen it against the current 64-bit xid so wraparound does not
+        # matter. Rows committed before the previous token may show up
+        # again: the response is state-based, so repeats are harmless.
+        rows = db.execute(text(f'''
+            WITH s AS (
+                SELECT pg_snapshot_xmax(pg_current_snapshot())::text::bigint AS next_xid
+            )
+            SELECT l.table_name, l.pin
+            FROM "{schema}"."parcel_transaction_log" l, s
+            WHERE l.transaction_date >= :after
+              AND ((s.next_xid - l.xmin::text::bigint) % 4294967296 + 4294967296) % 4294967296
+                  <= s.next_xid - :since
+        '''), {
+            "since": since_xid,
+            "after": since_time - timedelta(seconds=CHANGES_OVERLAP_SECONDS)
+        }).fetchall()
+
+        if not rows:
+            return {"status": "success", "token": token, "full_reload": False,
+                    "upserted": [], "removed": []}
+
+        # Every pin touched by a logged edit, per parcel table. Whether it was
+        # added/changed or removed is decided by its current state below.
+        touched: Dict[str, Set[str]] = {}
+        for table_name, pin in rows:
+            if table_name and pin:
+                touched.setdefault(table_name, set()).add(pin)
+
+        if sum(len(pins) for pins in touched.values()) > CHANGES_MAX_PINS:
+            return {"status": "success", "token": token, "full_reload": True}
+
+        parcel_tables = set(list_parcel_tables(db, schema))
+        upserted: List[dict] = []
+        removed: List[Dict[str, str]] = []
+
+        for table, pins in touched.items():
+            if table not in parcel_tables:
+                continue
+
+            present = db.execute(text(f'''
+                SELECT t."pin", ST_AsGeoJSON(t.geom)::json AS geometry
+                FROM "{schema}"."{table}" t
+                WHERE t."pin" = ANY(:pins)
+            '''), {"pins": list(pins)}).fetchall()
+
+            found = set()
+            for pin, geometry in present:
+                found.add(pin)
+                if not geometry:
+                    continue
+                upserted.append({
+                    "type": "Feature",
+                    "geometry": geometry,
+                    "properties": {
+                        "pin": pin,
+                        "source_schema": schema,
+                        "source_table": table
+                    }
+                })
+
+            removed.extend(
+                {"pin": pin, "source_schema": schema, "source_table": table}
+                for pin in sorted(pins - found)
+            )
+
+        print(f"🔄 Changes in {schema} since {since}: {len(upserted)} upserted, {len(removed)} removed")
+        return {
+            "status": "success",
+            "token": token,
+            "full_reload": False,
+            "upserted": upserted,
+            "removed": removed
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error reading changes for {schema}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ==========================================================
+# 📣 Server-sent events
+# ==========================================================
+@router.get("/layers/{schema}/events")
+async def layer_events_stream(
+    request: Request,
+    schema: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_user_main_db)
+):
+    """
+    text/event-stream emitting a `changed` event whenever the app edits a
+    layer in this schema; clients then call /layers/{schema}/changes.
+    """
+    validate_user_schemas([schema], current_user)
+    key = catalog.db_key(db)
+    subscription = layer_events.subscribe(key, schema)
+    _, queue = subscription
+
+    async def events():
+        try:
+            yield f"event: ready\ndata: {json.dumps({'schema': schema})}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: changed\ndata: {json.dumps(message)}\n\n"
+        finally:
+            layer_events.unsubscribe(key, schema, subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,53 @@
+# routes/layer_events.py
+# In-process publish/subscribe for layer change notifications (SSE).
+import asyncio
+import threading
+from typing import Dict, Set, Tuple
+
+_lock = threading.Lock()
+
+# (db_key, schema) -> {(loop, queue), ...}; one queue per connected client
+_subscribers: Dict[Tuple[str, str], Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+
+# Undelivered messages kept per client before older ones are dropped
+QUEUE_SIZE = 100
+
+
+def subscribe(key: str, schema: str) -> Tuple[asyncio.AbstractEventLoop, asyncio.Queue]:
+    """Register a client; must be called from the event loop serving it."""
+    subscription = (asyncio.get_running_loop(), asyncio.Queue(maxsize=QUEUE_SIZE))
+    with _lock:
+        _subscribers.setdefault((key, schema), set()).add(subscription)
+    return subscription
+
+
+def unsubscribe(key: str, schema: str, subscription):
+    with _lock:
+        clients = _subscribers.get((key, schema))
+        if clients is None:
+            return
+        clients.discard(subscription)
+        if not clients:
+            del _subscribers[(key, schema)]
+
+
+def _deliver(queue: asyncio.Queue, message: dict):
+    if queue.full():
+        # Slow client: only the newest version matters
+        queue.get_nowait()
+    queue.put_nowait(message)
+
+
+def publish(key: str, schema: str, message: dict):
+    """
+    Notify every client of this schema. Safe to call from worker threads
+    (sync endpoints), hence call_soon_threadsafe.
+    """
+    with _lock:
+        clients = list(_subscribers.get((key, schema), ()))
+    for loop, queue in clients:
+        try:
+            loop.call_soon_threadsafe(_deliver, queue, message)
+        except RuntimeError:
+            # Loop already closed (shutdown)
+            unsubscribe(key, schema, (loop, queue))
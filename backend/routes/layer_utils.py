@@ -0,0 +1,263 @@
+# routes/layer_utils.py
+# Shared helpers for the map layer endpoints (geomdisplay, tiles).
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Iterator, Tuple, Optional
+from datetime import date, datetime
+from decimal import Decimal
+import json
+
+from auth.models import User
+from auth.access_control import AccessControl
+from routes import catalog
+
+# Tables that carry geom + pin but are not parcel layers
+# (case-insensitive substring match, as the former ILIKE '%...%' filters)
+EXCLUDED_TABLE_PATTERNS = [
+    "transaction_log",
+    "JoinedTable",
+    "CAMA-Table",
+    "RunSavedModel1",
+    "RunSavedModel2",
+]
+
+# Rows fetched per round trip when streaming a FeatureCollection
+STREAM_BATCH_SIZE = 2000
+
+# Output modes of the layer endpoints:
+#   default - rows -> Python dicts -> FastAPI JSON encoder
+#   stream  - FeatureCollection written incrementally from a server-side cursor
+#   postgis - FeatureCollection built as text by Postgres and passed through
+LAYER_MODES = ("default", "stream", "postgis")
+
+# At or above this zoom level geometries are sent at full resolution
+FULL_RESOLUTION_ZOOM = 18
+
+# Response formats; anything but geojson needs mode=default
+LAYER_FORMATS = ("geojson", "topojson", "fgb", "arrow")
+
+
+def check_layer_mode(mode: str, allowed=LAYER_MODES):
+    """Raise 400 if the requested output mode is not supported by the endpoint."""
+    if mode not in allowed:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid mode '{mode}'. Expected one of: {', '.join(allowed)}"
+        )
+
+
+def check_layer_format(layer_format: str, mode: str, allowed=LAYER_FORMATS):
+    """Raise 400 for an unsupported format or a format/mode combination."""
+    if layer_format not in allowed:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid format '{layer_format}'. Expected one of: {', '.join(allowed)}"
+        )
+    if layer_format != "geojson" and mode != "default":
+        raise HTTPException(
+            status_code=400,
+            detail=f"format={layer_format} is only available with mode=default"
+        )
+
+
+def layer_variant(
+    layer_format: str = "geojson",
+    precision: Optional[int] = None,
+    mode: str = "default"
+) -> str:
+    """Snapshot-cache variant for output options that change the body."""
+    if layer_format == "geojson" and precision is None and mode == "default":
+        return ""
+    return f"format={layer_format}&precision={precision}&mode={mode}"
+
+
+def validate_user_schemas(schemas: List[str], current_user: User) -> List[str]:
+    """
+    Check that the user is approved and may read every requested schema.
+    Returns the list of valid schemas or raises 403.
+    """
+    access_info = AccessControl.check_user_access(current_user)
+    if access_info["status"] == "pending_approval":
+        raise HTTPException(status_code=403, detail=access_info["message"])
+
+    invalid_schemas = []
+    valid_schemas = []
+    for schema in schemas:
+        if AccessControl.validate_schema_access(schema, current_user):
+            valid_schemas.append(schema)
+        else:
+            invalid_schemas.append(schema)
+
+    if invalid_schemas:
+        raise HTTPException(
+            status_code=403,
+            detail=f"Access denied to schemas: {', '.join(invalid_schemas)}"
+        )
+    if not valid_schemas:
+        raise HTTPException(status_code=403, detail="No valid schemas to query")
+
+    return valid_schemas
+
+
+def list_parcel_tables(db: Session, schema: str) -> List[str]:
+    """
+    Find all tables in a schema with both geom + pin columns,
+    excluding system/analysis tables (transaction logs, JoinedTable, ...).
+    """
+    excluded = [p.lower() for p in EXCLUDED_TABLE_PATTERNS]
+    return [
+        table for table in catalog.tables_with_columns(db, schema, ["geom", "pin"])
+        if not any(p in table.lower() for p in excluded)
+    ]
+
+
+def list_layer_columns(db: Session, schema: str, table: str) -> List[str]:
+    """All columns of a layer table except geom, in ordinal order."""
+    return [c for c in catalog.table_columns(db, schema, table) if c != "geom"]
+
+
+def parse_bbox(bbox: Optional[str]) -> Optional[Tuple[float, float, float, float]]:
+    """Parse a "minx,miny,maxx,maxy" (EPSG:4326) query parameter."""
+    if not bbox:
+        return None
+    try:
+        parts = [float(v.strip()) for v in bbox.split(",")]
+    except ValueError:
+        parts = []
+    if len(parts) != 4 or parts[0] > parts[2] or parts[1] > parts[3]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid bbox '{bbox}'. Expected minx,miny,maxx,maxy."
+        )
+    return tuple(parts)
+
+
+def simplify_tolerance(zoom: Optional[float]) -> Optional[float]:
+    """
+    Simplification tolerance in degrees for a web map zoom level:
+    the width of one 256px tile pixel at the equator. None = full resolution.
+    """
+    if zoom is None or zoom >= FULL_RESOLUTION_ZOOM:
+        return None
+    return 360.0 / (256 * 2 ** max(zoom, 0))
+
+
+def layer_filter_sql(
+    bbox: Optional[str] = None,
+    zoom: Optional[float] = None,
+    alias: str = "t"
+) -> Tuple[str, str, Dict[str, Any]]:
+    """
+    Translate the optional bbox/zoom parameters into SQL fragments.
+    Returns (geom_sql, where_sql, params):
+      - geom_sql simplifies with ST_SimplifyPreserveTopology when zoomed out
+      - where_sql filters with && so the GiST index on geom is used
+    """
+    geom_sql = f"{alias}.geom"
+    where_sql = "TRUE"
+    params: Dict[str, Any] = {}
+
+    tolerance = simplify_tolerance(zoom)
+    if tolerance is not None:
+        geom_sql = f"ST_SimplifyPreserveTopology({alias}.geom, :tolerance)"
+        params["tolerance"] = tolerance
+
+    bounds = parse_bbox(bbox)
+    if bounds is not None:
+        where_sql = f"{alias}.geom && ST_MakeEnvelope(:xmin, :ymin, :xmax, :ymax, 4326)"
+        params.update(zip(("xmin", "ymin", "xmax", "ymax"), bounds))
+
+    return geom_sql, where_sql, params
+
+
+def geojson_sql(geom_sql: str = "t.geom", precision: Optional[int] = None) -> str:
+    """ST_AsGeoJSON call, limited to `precision` decimal digits when given."""
+    if precision is None:
+        return f"ST_AsGeoJSON({geom_sql})"
+    return f"ST_AsGeoJSON({geom_sql}, {int(precision)})"
+
+
+def feature_collection_sql(
+    from_sql: str,
+    properties_sql: str,
+    geom_sql: str = "t.geom",
+    where_sql: str = "TRUE",
+    precision: Optional[int] = None
+) -> str:
+    """
+    Build a query returning the whole FeatureCollection as JSON text.
+    Postgres does the encoding (json_agg + ST_AsGeoJSON), so the result can be
+    sent to the client as-is without parsing rows into Python objects.
+    """
+    return f"""
+        SELECT json_build_object(
+            'type', 'FeatureCollection',
+            'features', COALESCE(json_agg(json_build_object(
+                'type', 'Feature',
+                'geometry', {geojson_sql(geom_sql, precision)}::json,
+                'properties', {properties_sql}
+            )), '[]'::json)
+        )::text AS collection
+        FROM {from_sql}
+        WHERE {where_sql} AND {geom_sql} IS NOT NULL
+    """
+
+
+def json_default(value: Any):
+    """json.dumps fallback matching what FastAPI returns for DB values."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, (bytes, memoryview)):
+        return bytes(value).hex()
+    return str(value)
+
+
+def stream_feature_collection(engine, layers: List[Tuple[Any, Dict, Dict]]) -> Iterator[bytes]:
+    """
+    Write a GeoJSON FeatureCollection incrementally.
+
+    `layers` is a list of (sql, params, extra_props). Each query returns the
+    property columns plus a `geometry` column holding ST_AsGeoJSON text, which
+    is spliced into the output without being parsed. Rows are read through a
+    server-side cursor in STREAM_BATCH_SIZE batches on a dedicated connection
+    (the request session is already closed when the body is sent).
+    """
+    yield b'{"type":"FeatureCollection","features":['
+    first = True
+
+    with engine.connect() as conn:
+        conn = conn.execution_options(stream_results=True, yield_per=STREAM_BATCH_SIZE)
+
+        for sql, params, extra_props in layers:
+            try:
+                result = conn.execute(sql, params)
+                keys = [k for k in result.keys() if k != "geometry"]
+
+                for batch in result.partitions():
+                    chunk = []
+                    for row in batch:
+                        mapping = row._mapping
+                        geometry = mapping["geometry"]
+                        if not geometry:
+                            continue
+
+                        props = {k: mapping[k] for k in keys}
+                        props.update(extra_props)
+                        chunk.append(
+                            '{"type":"Feature","geometry":' + geometry +
+                            ',"properties":' + json.dumps(props, default=json_default) + '}'
+                        )
+
+                    if chunk:
+                        yield (("" if first else ",") + ",".join(chunk)).encode("utf-8")
+                        first = False
+
+                conn.commit()
+            except Exception as e:
+                print(f"⚠️ Streaming query failed ({extra_props}): {e}")
+                conn.rollback()
+                continue
+
+    yield b"]}"
@@ -0,0 +1,132 @@
+# routes/layer_versions.py
+# Version tokens (ETags) for map layers, keyed on edit activity.
+import hashlib
+import os
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from routes import (
+    boundary_cache, catalog, facets, layer_cache, layer_events, parcel_cache, suggest_index
+)
+
+# Tokens also roll over after this many seconds, so changes made outside
+# the app (e.g. a QGIS import) reach clients without a restart.
+LAYER_VERSION_MAX_AGE = int(os.getenv("LAYER_VERSION_MAX_AGE", "3600"))
+
+# Seconds a schema's last transaction_date is reused before the log is read
+# again; in-app edits drop it at once (layer_changed), this only bounds how
+# late edits made outside the app are noticed
+LAST_EDIT_CACHE_SECONDS = int(os.getenv("LAST_EDIT_CACHE_SECONDS", "30"))
+
+# Changes with every process start: in-memory counters begin again at 0
+_PROCESS_NONCE = uuid.uuid4().hex
+
+_lock = threading.Lock()
+
+# (db_key, schema) -> number of in-app edits (landmarks, boundaries, parcels)
+_counters: Dict[Tuple[str, str], int] = {}
+
+# (db_key, schema) -> (read_at, last transaction_date)
+_last_edit_cache: Dict[Tuple[str, str], Tuple[float, Optional[str]]] = {}
+
+
+def layer_changed(db_or_key, schema: str, pins: Optional[List[str]] = None):
+    """
+    Record that the app changed a layer in this schema (landmark CRUD,
+    boundary edits, parcel edits). Call after the transaction is committed.
+    Bumps the layer version, invalidates the schema's derived data (layer
+    snapshots, boundary sets, facets, suggest index) and notifies clients
+    listening on /layers/{schema}/events.
+    `pins` lists the parcels whose JoinedTable records changed ([] for none);
+    None drops every cached parcel record of the schema.
+    """
+    key = db_or_key if isinstance(db_or_key, str) else catalog.db_key(db_or_key)
+    with _lock:
+        _counters[(key, schema)] = _counters.get((key, schema), 0) + 1
+        counter = _counters[(key, schema)]
+        _last_edit_cache.pop((key, schema), None)
+    layer_cache.invalidate(key, schema)
+    boundary_cache.invalidate(key, schema)
+    facets.invalidate(key, schema)
+    suggest_index.invalidate(key, schema)
+    if pins is None or pins:
+        parcel_cache.invalidate(key, schema, pins)
+    layer_events.publish(key, schema, {"schema": schema, "change": counter})
+
+
+def _last_edits(db: Session, schemas: List[str]) -> List[Optional[str]]:
+    """
+    Latest parcel_transaction_log.transaction_date per schema. Cached for
+    LAST_EDIT_CACHE_SECONDS; the schemas not cached are read in one round trip.
+    """
+    key = catalog.db_key(db)
+    now = time.time()
+    by_schema: Dict[str, Optional[str]] = {}
+    with _lock:
+        for s in schemas:
+            cached = _last_edit_cache.get((key, s))
+            if cached and now - cached[0] < LAST_EDIT_CACHE_SECONDS:
+                by_schema[s] = cached[1]
+
+    missing = [s for s in schemas if s not in by_schema]
+    logged = [s for s in missing if catalog.table_exists(db, s, "parcel_transaction_log")]
+    if logged:
+        selects = ", ".join(
+            f'(SELECT max(transaction_date) FROM "{s}"."parcel_transaction_log")'
+            for s in logged
+        )
+        try:
+            row = db.execute(text(f"SELECT {selects}")).fetchone()
+        except Exception as e:
+            # Unknown version: make the token unique so nothing is reused
+            db.rollback()
+            print(f"⚠️ Could not read transaction log dates: {e}")
+            return [uuid.uuid4().hex] * len(schemas)
+        by_schema.update({s: (str(v) if v is not None else None) for s, v in zip(logged, row)})
+
+    with _lock:
+        for s in missing:
+            _last_edit_cache[(key, s)] = (now, by_schema.get(s))
+    return [by_schema.get(s) for s in schemas]
+
+
+def layer_version(db: Session, schemas: List[str]) -> str:
+    """Opaque version of the layers in the given schemas."""
+    key = catalog.db_key(db)
+    parts = [_PROCESS_NONCE, str(int(time.time() // LAYER_VERSION_MAX_AGE))]
+    for schema, last_edit in zip(schemas, _last_edits(db, schemas)):
+        parts.append(f"{schema}:{last_edit}:{_counters.get((key, schema), 0)}")
+    return "|".join(parts)
+
+
+def check_not_modified(
+    request: Request,
+    db: Session,
+    schemas: List[str]
+) -> Tuple[str, Optional[Response]]:
+    """
+    Compute the ETag for this request (layer version + query string) and
+    return (etag, 304 response) when the client already holds it,
+    otherwise (etag, None).
+    """
+    version = layer_version(db, schemas)
+    digest = hashlib.sha1(
+        f"{version}|{request.url.path}?{request.url.query}".encode("utf-8")
+    ).hexdigest()
+    etag = f'"{digest}"'
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [t.strip() for t in if_none_match.split(",")]:
+        return etag, Response(status_code=304, headers=etag_headers(etag))
+    return etag, None
+
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    """Headers making the browser revalidate with If-None-Match on every load."""
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
@@ -1,7 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from auth.dependencies import get_user_main_db
+from routes import boundary_cache, catalog, layer_versions
+from routes.layer_utils import (
+    feature_collection_sql,
+    check_layer_mode,
+    check_layer_format,
+    layer_filter_sql,
+    geojson_sql,
+)
+from routes.topojson_utils import to_topology
+from typing import Optional
 
 router = APIRouter()
 
@@ -16,10 +26,7 @@ def get_municipal_bounds(schema: str, db: Session = Depends(get_user_main_db)):
     """
     mun_code = schema.split("_")[0] if "_" in schema else schema
 
-    try:
-        current_db = db.execute(text("SELECT current_database()")).scalar()
-        print(f"📌 Connected to DB={current_db}, schema={schema}, mun_code={mun_code}")
-
+    def load_bounds():
         query = text(f"""
             SELECT bounds
             FROM "{schema}"."PH_MunicipalMap"
@@ -39,8 +46,14 @@ def get_municipal_bounds(schema: str, db: Session = Depends(get_user_main_db)):
             raise HTTPException(status_code=500, detail="Invalid bounds format.")
 
         print(f"🗺️ Bounding box for {schema}: {parts}")
+        return parts
+
+    try:
+        parts = boundary_cache.cached("municipal-bounds", catalog.db_key(db), schema, load_bounds)
         return {"status": "success", "bounds": parts}
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error fetching bounds for {schema}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -50,24 +63,79 @@ def get_municipal_bounds(schema: str, db: Session = Depends(get_user_main_db)):
 # 🧭 MUNICIPAL BOUNDARIES (Barangay + Section)
 # ==========================================================
 @router.get("/municipal-boundaries")
-def get_municipal_boundaries(schema: str, db: Session = Depends(get_user_main_db)):
+def get_municipal_boundaries(
+    request: Request,
+    response: Response,
+    schema: str,
+    mode: str = Query("default", description="default | postgis | cached"),
+    bbox: Optional[str] = Query(None, description="minx,miny,maxx,maxy (EPSG:4326)"),
+    zoom: Optional[float] = Query(None, description="Map zoom, used to simplify geometry"),
+    precision: Optional[int] = Query(None, ge=0, le=15, description="Max decimal digits of coordinates"),
+    layer_format: str = Query("geojson", alias="format", description="geojson | topojson"),
+    db: Session = Depends(get_user_main_db)
+):
     """
     Fetch Barangay and Section boundaries (GeoJSON) directly from the schema.
     Returns both in a single response.
+    With mode=postgis the FeatureCollections are built as text by Postgres.
+    Optional bbox/zoom restrict features to the view and simplify geometry,
+    precision limits coordinate digits. format=topojson returns one quantized
+    Topology (objects "barangay" and "section") so shared edges are sent once.
+    With mode=cached both tables are loaded concurrently, generalized (~1 m)
+    and kept in an in-memory LRU shared with find-barangay; bbox, zoom and
+    precision do not apply to this mode.
+    Answers If-None-Match with 304 while no boundary change was recorded.
     """
+    check_layer_mode(mode, ("default", "postgis", "cached"))
+    if mode == "cached":
+        if bbox is not None or zoom is not None or precision is not None:
+            raise HTTPException(
+                status_code=400,
+                detail="mode=cached returns the full generalized set; bbox, zoom and precision are not supported"
+            )
+    else:
+        check_layer_format(layer_format, mode)
+    geom_sql, where_sql, filter_params = layer_filter_sql(bbox, zoom)
+
+    # ✅ Conditional GET keyed on the schema's edit activity
+    etag, not_modified = layer_versions.check_not_modified(request, db, [schema])
+    if not_modified:
+        return not_modified
+    response.headers.update(layer_versions.etag_headers(etag))
+
     try:
         current_db = db.execute(text("SELECT current_database()")).scalar()
         print(f"📌 Connected to DB={current_db}, schema={schema} (GET municipal-boundaries)")
 
+        if mode == "cached":
+            try:
+                boundaries = boundary_cache.boundary_set(db, schema)
+            except LookupError as e:
+                raise HTTPException(status_code=404, detail=str(e))
+
+            if layer_format == "topojson":
+                if boundaries.topology is None:
+                    boundaries.topology = to_topology(boundaries.collections)
+                return {"status": "success", "topology": boundaries.topology}
+            return {"status": "success", **boundaries.collections}
+
+        if mode == "postgis":
+            postgis_response = _municipal_boundaries_postgis(
+                db, schema, geom_sql, where_sql, filter_params, precision
+            )
+            postgis_response.headers.update(layer_versions.etag_headers(etag))
+            return postgis_response
+
         results = {"barangay": None, "section": None}
 
         # --- Barangay Boundary ---
         try:
             query_barangay = text(f'''
-                SELECT *, ST_AsGeoJSON(geom)::json AS geometry
-                FROM "{schema}"."BarangayBoundary"
+                SELECT t.*, {geojson_sql(geom_sql, precision)}::json AS geometry
+                FROM "{schema}"."BarangayBoundary" t
+                WHERE {where_sql}
             ''')
-            barangay_rows = db.execute(query_barangay).mappings().all()
+            barangay_rows = db.execute(query_barangay, filter_params).mappings().all()
             results["barangay"] = {
                 "type": "FeatureCollection",
                 "features": [
@@ -81,15 +149,17 @@ def get_municipal_boundaries(schema: str, db: Session = Depends(get_user_main_db
             }
             print(f"✅ Loaded {len(barangay_rows)} barangay features.")
         except Exception as e:
+            db.rollback()
             print(f"⚠️ BarangayBoundary fetch failed for {schema}: {e}")
 
         # --- Section Boundary ---
         try:
             query_section = text(f'''
-                SELECT *, ST_AsGeoJSON(geom)::json AS geometry
-                FROM "{schema}"."SectionBoundary"
+                SELECT t.*, {geojson_sql(geom_sql, precision)}::json AS geometry
+                FROM "{schema}"."SectionBoundary" t
+                WHERE {where_sql}
             ''')
-            section_rows = db.execute(query_section).mappings().all()
+            section_rows = db.execute(query_section, filter_params).mappings().all()
             results["section"] = {
                 "type": "FeatureCollection",
                 "features": [
@@ -103,6 +173,7 @@ def get_municipal_boundaries(schema: str, db: Session = Depends(get_user_main_db
             }
             print(f"✅ Loaded {len(section_rows)} section features.")
         except Exception as e:
+            db.rollback()
             print(f"⚠️ SectionBoundary fetch failed for {schema}: {e}")
 
         if not results["barangay"] and not results["section"]:
@@ -111,8 +182,53 @@ def get_municipal_boundaries(schema: str, db: Session = Depends(get_user_main_db
                 detail=f"No BarangayBoundary or SectionBoundary found for schema={schema}"
             )
 
+        if layer_format == "topojson":
+            return {"status": "success", "topology": to_topology(results)}
+
         return {"status": "success", **results}
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error fetching municipal boundaries for {schema}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+def _municipal_boundaries_postgis(
+    db: Session,
+    schema: str,
+    geom_sql: str = "t.geom",
+    where_sql: str = "TRUE",
+    filter_params: Optional[dict] = None,
+    precision: Optional[int] = None
+) -> Response:
+    """Build both boundary FeatureCollections in Postgres and splice the texts."""
+    collections = {"barangay": None, "section": None}
+
+    for key, table in (("barangay", "BarangayBoundary"), ("section", "SectionBoundary")):
+        try:
+            sql = text(feature_collection_sql(
+                from_sql=f'"{schema}"."{table}" t',
+                properties_sql="to_jsonb(t) - 'geom'",
+                geom_sql=geom_sql,
+                where_sql=where_sql,
+                precision=precision
+            ))
+            collections[key] = db.execute(sql, filter_params or {}).scalar()
+            print(f"✅ Built {table} collection in PostGIS.")
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ {table} fetch failed for {schema}: {e}")
+
+    if not collections["barangay"] and not collections["section"]:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No BarangayBoundary or SectionBoundary found for schema={schema}"
+        )
+
+    body = (
+        '{"status":"success"'
+        f',"barangay":{collections["barangay"] or "null"}'
+        f',"section":{collections["section"] or "null"}}}'
+    )
+    return Response(content=body, media_type="application/json")
@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Request, Depends
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 from auth.dependencies import get_user_main_db
+from routes import catalog
 
 router = APIRouter()
 
@@ -122,6 +123,7 @@ async def save_orthophoto_config(request: Request, db: Session = Depends(get_use
 def create_table_if_missing(db: Session, schema: str):
     """Ensure the 'Orthophotos' table exists for this schema."""
     try:
+        existed = catalog.table_exists(db, schema, "Orthophotos")
         db.execute(text(f"""
             CREATE TABLE IF NOT EXISTS "{schema}"."Orthophotos" (
                 id SERIAL PRIMARY KEY,
@@ -130,6 +132,8 @@ def create_table_if_missing(db: Session, schema: str):
             );
         """))
         db.commit()
+        if not existed:
+            catalog.invalidate(db, schema)
         print(f"🧱 Ensured {schema}.Orthophotos exists.")
     except Exception as e:
         db.rollback()
@@ -0,0 +1,178 @@
+# routes/pagination.py
+# Keyset (cursor) pagination for table/search endpoints.
+import base64
+import json
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from routes import catalog
+from routes.layer_utils import json_default
+
+PAGE_MAX_LIMIT = 5000
+
+# Preferred unique key per table; other tables use the first of KEY_COLUMNS present
+TABLE_KEYS = {"JoinedTable": "pin", "Landmarks": "id"}
+KEY_COLUMNS = ("id", "pin", "gid")
+
+
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    raw = json.dumps(payload, default=json_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if not isinstance(payload, dict) or "k" not in payload:
+            raise ValueError
+        return payload
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def key_column(db: Session, schema: str, table: str) -> str:
+    columns = catalog.table_columns(db, schema, table)
+    preferred = TABLE_KEYS.get(table)
+    if preferred in columns:
+        return preferred
+    for col in KEY_COLUMNS:
+        if col in columns:
+            return col
+    raise HTTPException(status_code=400, detail=f'"{table}" has no key column for pagination')
+
+
+def estimate_count(db: Session, schema: str, table: str, where_sql: str, params: dict) -> Optional[int]:
+    """
+    Approximate row count: pg_class.reltuples without filters, the planner's
+    row estimate (EXPLAIN) with filters. Never scans the table.
+    """
+    try:
+        if where_sql == "TRUE":
+            value = db.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+                {"name": f'"{schema}"."{table}"'}
+            ).scalar()
+        else:
+            plan = db.execute(
+                text(f'EXPLAIN (FORMAT JSON) SELECT 1 FROM "{schema}"."{table}" t WHERE {where_sql}'),
+                params
+            ).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            value = plan[0]["Plan"]["Plan Rows"]
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ Count estimate failed for {schema}.{table}: {e}")
+        return None
+    # reltuples is -1 for never-analyzed tables
+    return int(value) if value is not None and value >= 0 else None
+
+
+def paginate(
+    db: Session,
+    schema: str,
+    table: str,
+    where_sql: str = "TRUE",
+    params: Optional[dict] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    order_by: Optional[str] = None,
+    columns: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    One page of `SELECT ... FROM schema.table t WHERE where_sql`, ordered by
+    `order_by` ("col" or "-col" for descending, default the key) then the key
+    column, resuming after `cursor`. Column names come from the catalog;
+    unknown names are rejected with 400.
+    """
+    if limit < 1 or limit > PAGE_MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {PAGE_MAX_LIMIT}")
+
+    table_columns = catalog.table_columns(db, schema, table)
+    if not table_columns:
+        raise HTTPException(status_code=404, detail=f'Table "{schema}"."{table}" not found')
+
+    key = key_column(db, schema, table)
+    descending = bool(order_by) and order_by.startswith("-")
+    order_col = (order_by or key).lstrip("-")
+
+    if columns:
+        unknown = [c for c in columns if c not in table_columns]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown columns: {', '.join(unknown)}")
+    if order_col not in table_columns:
+        raise HTTPException(status_code=400, detail=f"Unknown order_by column: {order_col}")
+
+    selected = list(columns or [c for c in table_columns if c != "geom"])
+    for col in (key, order_col):
+        if col not in selected:
+            selected.append(col)
+
+    params = dict(params or {})
+    conditions = [where_sql]
+    direction, op = ("DESC", "<") if descending else ("ASC", ">")
+
+    if cursor:
+        position = decode_cursor(cursor)
+        if position.get("o") != (order_by or key):
+            raise HTTPException(status_code=400, detail="Cursor was issued for a different order_by")
+        params["_cursor_key"] = position["k"]
+        if order_col == key:
+            conditions.append(f't."{key}" {op} :_cursor_key')
+        elif position.get("v") is None:
+            # Inside the trailing NULL group
+            conditions.append(f't."{order_col}" IS NULL AND t."{key}" {op} :_cursor_key')
+        else:
+            params["_cursor_value"] = position["v"]
+            conditions.append(
+                f'(t."{order_col}" {op} :_cursor_value'
+                f' OR (t."{order_col}" = :_cursor_value AND t."{key}" {op} :_cursor_key)'
+                f' OR t."{order_col}" IS NULL)'
+            )
+
+    order_sql = f't."{key}" {direction}' if order_col == key else \
+        f't."{order_col}" {direction} NULLS LAST, t."{key}" {direction}'
+    col_sql = ", ".join(f't."{c}"' for c in selected)
+
+    rows = [
+        dict(row._mapping)
+        for row in db.execute(
+            text(f'''
+                SELECT {col_sql}
+                FROM "{schema}"."{table}" t
+                WHERE {" AND ".join(f"({c})" for c in conditions)}
+                ORDER BY {order_sql}
+                LIMIT :_limit
+            '''),
+            {**params, "_limit": limit + 1}
+        )
+    ]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor({"o": order_by or key, "v": last[order_col], "k": last[key]})
+
+    if columns:
+        rows = [{c: row[c] for c in columns} for row in rows]
+
+    return {
+        "status": "success",
+        "data": rows,
+        "count": len(rows),
+        "next_cursor": next_cursor,
+        "total_estimate": estimate_count(db, schema, table, where_sql, params) if not cursor else None,
+    }
+
+
+def parse_columns(columns) -> Optional[List[str]]:
+    """Accept "a,b,c" (query string) or ["a", "b"] (JSON body)."""
+    if not columns:
+        return None
+    if isinstance(columns, str):
+        columns = columns.split(",")
+    return [c.strip() for c in columns if c and c.strip()]
@@ -0,0 +1,81 @@
+# routes/parcel_cache.py
+# LRU of JoinedTable records by (database, schema, pin), capped by size.
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from routes.layer_utils import json_default
+
+# Approximate memory budget (serialized size of cached records)
+PARCEL_CACHE_MAX_BYTES = int(os.getenv("PARCEL_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# Records are re-read after this many seconds (edits made outside the app:
+# sync pulls, psql, QGIS)
+PARCEL_CACHE_MAX_AGE = int(os.getenv("PARCEL_CACHE_MAX_AGE", "300"))
+
+_lock = threading.Lock()
+
+# (db_key, schema, pin) -> (stored_at, record, size)
+_records: "OrderedDict[Tuple[str, str, str], Tuple[float, Dict, int]]" = OrderedDict()
+_total_bytes = 0
+
+# (db_key, schema) -> invalidation count; a record read before an edit must
+# not be stored after it
+_generations: Dict[Tuple[str, str], int] = {}
+
+
+def generation(db_key: str, schema: str) -> int:
+    return _generations.get((db_key, schema), 0)
+
+
+def get(db_key: str, schema: str, pin: str) -> Optional[Dict]:
+    global _total_bytes
+    key = (db_key, schema, pin)
+    with _lock:
+        entry = _records.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry[0] >= PARCEL_CACHE_MAX_AGE:
+            del _records[key]
+            _total_bytes -= entry[2]
+            return None
+        _records.move_to_end(key)
+        return entry[1]
+
+
+def put(db_key: str, schema: str, pin: str, record: Dict, read_generation: int):
+    global _total_bytes
+    size = len(json.dumps(record, default=json_default))
+    if size > PARCEL_CACHE_MAX_BYTES:
+        return
+
+    key = (db_key, schema, pin)
+    with _lock:
+        if _generations.get((db_key, schema), 0) != read_generation:
+            return
+        old = _records.pop(key, None)
+        if old is not None:
+            _total_bytes -= old[2]
+        _records[key] = (time.time(), record, size)
+        _total_bytes += size
+        while _total_bytes > PARCEL_CACHE_MAX_BYTES:
+            _, (_, _, dropped) = _records.popitem(last=False)
+            _total_bytes -= dropped
+
+
+def invalidate(db_key: str, schema: str, pins: Optional[Iterable[str]] = None):
+    """Drop the given PINs of a schema, or every cached record of it (pins=None)."""
+    global _total_bytes
+    with _lock:
+        _generations[(db_key, schema)] = _generations.get((db_key, schema), 0) + 1
+        if pins is None:
+            keys = [k for k in _records if k[0] == db_key and k[1] == schema]
+        else:
+            keys = [(db_key, schema, pin) for pin in pins if pin]
+        for key in keys:
+            entry = _records.pop(key, None)
+            if entry is not None:
+                _total_bytes -= entry[2]
@@ -1,11 +1,25 @@
 from fastapi import APIRouter, HTTPException, Depends
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 from sqlalchemy import text
+from typing import List, Optional
 from auth.dependencies import get_current_user, get_user_main_db
 from auth.models import User
+from routes import catalog, parcel_cache
+from routes.layer_utils import list_parcel_tables
 
 router = APIRouter()
 
+# Max PINs accepted by /parcel-info/batch
+PARCEL_BATCH_MAX = 5000
+
+
+class ParcelBatchQuery(BaseModel):
+    db_schema: str = Field(alias="schema")
+    pins: List[str]
+    table: Optional[str] = None      # parcel geometry table; default: all parcel tables
+    geometry: bool = True
+
 # ==========================================================
 # 🧾 Get parcel information by PIN
 # ==========================================================
@@ -16,6 +30,12 @@ def get_parcel_info(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_user_main_db)
 ):
+    key = catalog.db_key(db)
+    cached = parcel_cache.get(key, schema, pin)
+    if cached is not None:
+        return {"status": "success", "data": cached}
+    generation = parcel_cache.generation(key, schema)
+
     try:
         # ✅ Query parcel data from JoinedTable
         result = db.execute(
@@ -33,8 +53,87 @@ def get_parcel_info(
 
         # ✅ Convert row to dictionary
         data = dict(row._mapping) if hasattr(row, "_mapping") else dict(row)
+        parcel_cache.put(key, schema, pin, data, generation)
         return {"status": "success", "data": data}
 
     except Exception as e:
         print(f"❌ Error retrieving parcel info for {pin} in {schema}: {e}")
         return {"status": "error", "message": str(e)}
+
+
+
+# ==========================================================
+# 📚 Batch parcel information (attributes + geometry)
+# ==========================================================
+@router.post("/parcel-info/batch")
+def get_parcel_info_batch(
+    body: ParcelBatchQuery,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_user_main_db)
+):
+    """
+    JoinedTable attributes and parcel geometry for many PINs in one query,
+    keyed by PIN. PINs found nowhere are listed in "missing".
+    """
+    schema = body.db_schema
+    pins = list(dict.fromkeys(p for p in body.pins if p))
+    if not pins:
+        return {"status": "success", "data": {}, "missing": []}
+    if len(pins) > PARCEL_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {PARCEL_BATCH_MAX} PINs per request")
+
+    parcel_tables = list_parcel_tables(db, schema)
+    if body.table is not None:
+        if body.table not in parcel_tables:
+            raise HTTPException(status_code=404, detail=f"Parcel table '{body.table}' not found in {schema}")
+        parcel_tables = [body.table]
+    if not body.geometry:
+        parcel_tables = []
+
+    has_attributes = catalog.table_exists(db, schema, "JoinedTable")
+    if not has_attributes and not parcel_tables:
+        raise HTTPException(status_code=404, detail=f"No JoinedTable or parcel table in {schema}")
+
+    attr_sql = (
+        f'SELECT j.pin, to_jsonb(j) - \'geom\' AS attributes '
+        f'FROM "{schema}"."JoinedTable" j WHERE j.pin = ANY(:pins)'
+        if has_attributes else
+        "SELECT NULL::text AS pin, NULL::jsonb AS attributes WHERE FALSE"
+    )
+    geom_sql = " UNION ALL ".join(
+        f'SELECT g.pin::text AS pin, g.geom, CAST(:t{i} AS text) AS source_table '
+        f'FROM "{schema}"."{table}" g WHERE g.pin = ANY(:pins)'
+        for i, table in enumerate(parcel_tables)
+    ) or "SELECT NULL::text AS pin, NULL::geometry AS geom, NULL::text AS source_table WHERE FALSE"
+
+    try:
+        rows = db.execute(
+            text(f'''
+                SELECT COALESCE(a.pin::text, g.pin) AS pin,
+                       a.attributes,
+                       ST_AsGeoJSON(g.geom)::json AS geometry,
+                       g.source_table
+                FROM ({attr_sql}) a
+                FULL JOIN ({geom_sql}) g ON g.pin = a.pin::text
+            '''),
+            {"pins": pins, **{f"t{i}": table for i, table in enumerate(parcel_tables)}}
+        ).mappings().all()
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Batch parcel info failed in {schema}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    data = {}
+    for row in rows:
+        # A PIN present in several parcel tables keeps its first match
+        if row["pin"] in data:
+            continue
+        data[row["pin"]] = {
+            "attributes": row["attributes"],
+            "geometry": row["geometry"],
+            "source_table": row["source_table"],
+        }
+
+    missing = [pin for pin in pins if pin not in data]
+    print(f"✅ Batch parcel info in {schema}: {len(data)} found, {len(missing)} missing")
+    return {"status": "success", "data": data, "missing": missing}
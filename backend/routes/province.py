@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 from auth.dependencies import get_user_main_db   # ✅ correct source
+from routes import boundary_cache, catalog
 
 router = APIRouter(prefix="/province", tags=["Province Data"])
 
@@ -12,7 +13,8 @@ def get_provincial_bounds(db: Session = Depends(get_user_main_db)):
     Uses the 'bounds' column from public."PH_ProvincialMap",
     matching the current database's provincial code.
     """
-    try:
+    # Bounds rarely change: served from the boundary cache after the first call
+    def load_bounds():
         # 🔹 Step 1: Identify current database (e.g. "PH04034_Laguna")
         result = db.execute(text("SELECT current_database()"))
         db_name = result.scalar()
@@ -58,6 +60,8 @@ def get_provincial_bounds(db: Session = Depends(get_user_main_db)):
             "bounds": bounds_values
         }
 
+    try:
+        return boundary_cache.cached("provincial-bounds", catalog.db_key(db), None, load_bounds)
     except HTTPException:
         raise
     except Exception as e:
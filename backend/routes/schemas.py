@@ -3,10 +3,17 @@ from auth.dependencies import get_current_user, get_user_main_db
 from auth.models import User
 from auth.access_control import AccessControl
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from routes import catalog
 
 router = APIRouter()
 
+SYSTEM_SCHEMAS = {
+    'information_schema', 'pg_catalog', 'pg_toast', 'public',
+    'credentials_login', 'auth', 'storage', 'vault',
+    'graphql', 'graphql_public', 'realtime', 'extensions',
+    'pgbouncer', 'postgres', 'credentials_users_schema'
+}
+
 # ==========================================================
 # 📜 List available schemas for the logged-in user
 # ==========================================================
@@ -26,21 +33,13 @@ def list_schemas(
         raise HTTPException(status_code=403, detail=access_info["message"])
 
     try:
-        # ✅ Retrieve all non-system schemas
-        result = db.execute(text("""
-            SELECT schema_name
-            FROM information_schema.schemata
-            WHERE schema_name NOT IN (
-                'information_schema', 'pg_catalog', 'pg_toast', 'public',
-                'credentials_login', 'auth', 'storage', 'vault',
-                'graphql', 'graphql_public', 'realtime', 'extensions',
-                'pgbouncer', 'postgres', 'credentials_users_schema'
-            )
-            AND schema_name NOT LIKE 'pg_%'
-            AND schema_name NOT LIKE '%credential%'
-            ORDER BY schema_name
-        """))
-        all_schemas = [row[0] for row in result]
+        # ✅ Retrieve all non-system schemas (cached catalog)
+        all_schemas = [
+            s for s in catalog.list_schemas(db)
+            if s not in SYSTEM_SCHEMAS
+            and not s.startswith("pg_")
+            and "credential" not in s
+        ]
         print(f"All available schemas: {all_schemas}")
 
         # ✅ Filter schemas based on user access permissions
@@ -4,13 +4,42 @@
 #  landmark, and attribute (JoinedTable) data.
 # ============================================================
 
-from fastapi import APIRouter, Depends, HTTPException, Request, Query
+import json
+from shapely.geometry import shape
+from shapely.validation import explain_validity
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import text
+from typing import Optional
 from auth.dependencies import get_user_main_db
+from routes import binary_formats, catalog, exports, search_indexes, suggest_index
+from routes.layer_utils import list_parcel_tables
+from routes.pagination import decode_cursor, encode_cursor, key_column, paginate, parse_columns
 
 router = APIRouter(prefix="/search", tags=["Search Tools"])
 
+
+def _paged_search(db: Session, data: dict, schema: str, table: str, where_clauses: list, params: dict):
+    """
+    Keyset-paginated variant of a search, used when the request body has
+    "limit" (optional: "cursor", "order_by", "columns").
+    """
+    try:
+        limit = int(data["limit"])
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="limit must be an integer")
+
+    return paginate(
+        db, schema, table,
+        where_sql=" AND ".join(where_clauses) if where_clauses else "TRUE",
+        params=params,
+        limit=limit,
+        cursor=data.get("cursor"),
+        order_by=data.get("order_by"),
+        columns=parse_columns(data.get("columns"))
+    )
+
+
 # ============================================================
 # 🧩 1. ATTRIBUTE TABLE (JoinedTable Loader)
 # ============================================================
@@ -18,8 +47,25 @@ router = APIRouter(prefix="/search", tags=["Search Tools"])
 @router.get("/attribute-table")
 def get_attribute_table(
     schema: str = Query(..., description="Municipal schema name, e.g., PH0403406"),
+    layer_format: str = Query("json", alias="format", description="json | fgb | arrow | csv | parquet"),
+    limit: Optional[int] = Query(None, description="Page size; enables keyset pagination"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    order_by: Optional[str] = Query(None, description="Column to sort by, prefix - for descending"),
+    columns: Optional[str] = Query(None, description="Comma-separated columns to return"),
     db: Session = Depends(get_user_main_db)
 ):
+    """
+    Returns the whole JoinedTable of a schema. format=arrow returns an
+    Arrow IPC stream and format=fgb a FlatGeobuf file (needs a geometry column).
+    With `limit`, returns one keyset-paginated page (keyed on pin) with
+    next_cursor and a total_estimate taken from pg_class.reltuples.
+    For arrow / fgb, `limit` keeps the first rows by pin and `columns`
+    selects the properties (no cursor).
+    format=csv / format=parquet stream a file download of the whole table.
+    """
+    if layer_format not in ("json",) + binary_formats.BINARY_FORMATS + exports.EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid format '{layer_format}'")
+
     try:
         print(f"📂 Fetching JoinedTable for schema: {schema}")
 
@@ -39,6 +85,58 @@ def get_attribute_table(
                 "data": []
             }
 
+        if layer_format in exports.EXPORT_FORMATS:
+            return exports.export_table(db, layer_format, schema, "JoinedTable")
+
+        if limit is not None and layer_format == "json":
+            page = paginate(
+                db, schema, "JoinedTable",
+                limit=limit, cursor=cursor, order_by=order_by, columns=parse_columns(columns)
+            )
+            print(f"✅ Retrieved page of {page['count']} records from {schema}.JoinedTable")
+            return page
+
+        if layer_format in binary_formats.BINARY_FORMATS:
+            geom_cols = [
+                col for col, col_type in catalog.column_types(db, schema, "JoinedTable").items()
+                if col_type == "geometry"
+            ]
+            if layer_format == "fgb" and not geom_cols:
+                raise HTTPException(status_code=400, detail="format=fgb needs a geometry column")
+
+            if limit is not None and limit < 1:
+                raise HTTPException(status_code=400, detail="limit must be at least 1")
+
+            # Extra geometry columns are not supported by the encoders
+            table_columns = [
+                col for col in catalog.table_columns(db, schema, "JoinedTable")
+                if col not in geom_cols[1:]
+            ]
+            selected = parse_columns(columns)
+            if selected:
+                unknown = [col for col in selected if col not in table_columns]
+                if unknown:
+                    raise HTTPException(status_code=400, detail=f"Unknown columns: {', '.join(unknown)}")
+                # FlatGeobuf always needs its geometry column
+                table_columns = [
+                    col for col in table_columns
+                    if col in selected or (layer_format == "fgb" and col == geom_cols[0])
+                ]
+            geom_col = geom_cols[0] if geom_cols and geom_cols[0] in table_columns else None
+
+            col_sql = ", ".join(f'"{col}"' for col in table_columns)
+            sql = f'SELECT {col_sql} FROM "{schema}"."JoinedTable"'
+            params = {}
+            if limit is not None:
+                sql += f' ORDER BY "{key_column(db, schema, "JoinedTable")}" LIMIT :limit'
+                params["limit"] = limit
+            frame = binary_formats.read_frame(db, sql, params, geom_col=geom_col)
+            print(f"✅ Retrieved {len(frame)} records from {schema}.JoinedTable ({layer_format})")
+            return binary_formats.binary_response(
+                binary_formats.encode_frame(frame, layer_format, "JoinedTable"),
+                layer_format, "JoinedTable"
+            )
+
         query = text(f'SELECT * FROM "{schema}"."JoinedTable"')
         result = db.execute(query)
         rows = [dict(row._mapping) for row in result]
@@ -46,6 +144,8 @@ def get_attribute_table(
         print(f"✅ Retrieved {len(rows)} records from {schema}.JoinedTable")
         return {"status": "success", "data": rows, "count": len(rows)}
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error fetching JoinedTable for {schema}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -55,8 +155,21 @@ def get_attribute_table(
 # 🏠 2. PROPERTY SEARCH
 # ============================================================
 
+FUZZY_MAX_RESULTS = 500
+
+
 @router.post("/property-search")
-async def property_search(request: Request, db: Session = Depends(get_user_main_db)):
+async def property_search(
+    request: Request,
+    db: Session = Depends(get_user_main_db)
+):
+    """
+    Substring search on JoinedTable fields. With "mode": "fuzzy" matches are
+    also accepted by trigram similarity, ranked by similarity() and limited
+    to "top" results (default 50); without pg_trgm it degrades to substring
+    matches ("ranking": "substring"). With "export": "csv" | "parquet" all
+    matches are streamed as a file download.
+    """
     data = await request.json()
     schema = data.get("schema")
     filters = data.get("filters", {})
@@ -64,6 +177,15 @@ async def property_search(request: Request, db: Session = Depends(get_user_main_
     if not schema:
         raise HTTPException(status_code=400, detail="Schema is required for property search.")
 
+    if data.get("mode") == "fuzzy":
+        return _fuzzy_property_search(db, schema, filters, data.get("top", 50))
+
+    if data.get("export"):
+        return exports.export_table(
+            db, data["export"], schema, "JoinedTable",
+            [(field, f"%{str(value).lower()}%") for field, value in filters.items() if value]
+        )
+
     try:
         where_clauses = []
         params = {}
@@ -75,6 +197,9 @@ async def property_search(request: Request, db: Session = Depends(get_user_main_
             where_clauses.append(f'LOWER("{field}") LIKE :{key}')
             params[key] = f"%{value.lower()}%"
 
+        if data.get("limit") is not None:
+            return _paged_search(db, data, schema, "JoinedTable", where_clauses, params)
+
         sql = f'SELECT * FROM "{schema}"."JoinedTable"'
         if where_clauses:
             sql += " WHERE " + " AND ".join(where_clauses)
@@ -86,11 +211,74 @@ async def property_search(request: Request, db: Session = Depends(get_user_main_
         print(f"✅ Property search in {schema}: {len(rows)} result(s)")
         return {"status": "success", "data": rows, "count": len(rows)}
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Property search error for {schema}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _fuzzy_property_search(
+    db: Session,
+    schema: str,
+    filters: dict,
+    top
+):
+    try:
+        top = int(top)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="top must be an integer")
+    if top < 1 or top > FUZZY_MAX_RESULTS:
+        raise HTTPException(status_code=400, detail=f"top must be between 1 and {FUZZY_MAX_RESULTS}")
+
+    filters = {f: str(v) for f, v in filters.items() if v}
+    if not filters:
+        raise HTTPException(status_code=400, detail="At least one filter is required for fuzzy search.")
+
+    fields = search_indexes.text_columns(db, schema, "JoinedTable", list(filters))
+    unknown = [f for f in filters if f not in fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Not searchable text fields: {', '.join(unknown)}")
+
+    # Without pg_trgm: substring matches only, in key order
+    trigram = search_indexes.has_trgm(db)
+
+    conditions, scores, params = [], [], {"top": top}
+    for i, (field, value) in enumerate(filters.items()):
+        params[f"v{i}"] = value.lower()
+        params[f"like{i}"] = f"%{value.lower()}%"
+        if trigram:
+            conditions.append(f'(LOWER(t."{field}") LIKE :like{i} OR LOWER(t."{field}") % :v{i})')
+            scores.append(f'similarity(LOWER(t."{field}"), :v{i})')
+        else:
+            conditions.append(f'LOWER(t."{field}") LIKE :like{i}')
+
+    if trigram:
+        score_sql = f'({" + ".join(scores)}) / {len(scores)}'
+        order_sql = "score DESC"
+    else:
+        score_sql = "NULL::real"
+        order_sql = f't."{key_column(db, schema, "JoinedTable")}"'
+
+    try:
+        rows = db.execute(text(f'''
+            SELECT t.*, {score_sql} AS score
+            FROM "{schema}"."JoinedTable" t
+            WHERE {" AND ".join(conditions)}
+            ORDER BY {order_sql}
+            LIMIT :top
+        '''), params).mappings().all()
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Fuzzy property search error for {schema}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    data = [{k: v for k, v in row.items() if k != "geom"} for row in rows]
+    print(f"✅ Fuzzy property search in {schema}: {len(data)} result(s)")
+    return {"status": "success", "data": data, "count": len(data),
+            "ranking": "trigram" if trigram else "substring"}
+
+
 # ============================================================
 # 🛣️ 3. ROAD SEARCH (Adaptive)
 # ============================================================
@@ -144,6 +332,9 @@ async def road_search(request: Request, db: Session = Depends(get_user_main_db))
                     'OR LOWER("type") LIKE :val OR LOWER("classification") LIKE :val)'
                 ]
 
+        if data.get("limit") is not None:
+            return _paged_search(db, data, schema, table_name, where_clauses, params)
+
         sql = f'SELECT * FROM "{schema}"."{table_name}"'
         if where_clauses:
             sql += " WHERE " + " AND ".join(where_clauses)
@@ -190,6 +381,9 @@ async def landmark_search(request: Request, db: Session = Depends(get_user_main_
             where_clauses.append(f'LOWER("{field}") LIKE :{key}')
             params[key] = f"%{value.lower()}%"
 
+        if data.get("limit") is not None:
+            return _paged_search(db, data, schema, "Landmarks", where_clauses, params)
+
         sql = f'SELECT * FROM "{schema}"."Landmarks"'
         if where_clauses:
             sql += " WHERE " + " AND ".join(where_clauses)
@@ -201,6 +395,303 @@ async def landmark_search(request: Request, db: Session = Depends(get_user_main_
         print(f"✅ Landmark search in {schema}: {len(rows)} result(s)")
         return {"status": "success", "data": rows, "count": len(rows)}
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Landmark search error for {schema}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# ============================================================
+# 🌐 5. GLOBAL SEARCH (parcels, roads, landmarks)
+# ============================================================
+
+GLOBAL_SEARCH_MAX_LIMIT = 100
+
+
+def _parse_bounds(value):
+    """JoinedTable.bounds is stored as "xmin,ymin,xmax,ymax" text."""
+    if value is None:
+        return None
+    try:
+        parts = [float(v.strip()) for v in str(value).split(",")]
+        return parts if len(parts) == 4 else None
+    except ValueError:
+        return None
+
+
+def _global_search_sql(schema: str, table: str, fields: list, select_sql: str, trigram: bool = True) -> str:
+    """
+    Ranked trigram/substring match over `fields` of one table. Without
+    pg_trgm (trigram=False) only substring matches are returned, scored
+    1 for an exact match, 0.5 for a prefix and 0.25 otherwise.
+    """
+    if trigram:
+        matches = " OR ".join(
+            f'LOWER(t."{f}") LIKE :like OR LOWER(t."{f}") % :q' for f in fields
+        )
+        scores = ", ".join(f'similarity(LOWER(t."{f}"), :q)' for f in fields)
+    else:
+        matches = " OR ".join(f'LOWER(t."{f}") LIKE :like' for f in fields)
+        scores = ", ".join(
+            f'CASE WHEN LOWER(t."{f}") = :q THEN 1.0 '
+            f'WHEN LOWER(t."{f}") LIKE :prefix THEN 0.5 '
+            f'WHEN LOWER(t."{f}") LIKE :like THEN 0.25 ELSE 0 END'
+            for f in fields
+        )
+    return f'''
+        SELECT {select_sql}, GREATEST({scores}) AS score
+        FROM "{schema}"."{table}" t
+        WHERE {matches}
+        ORDER BY score DESC
+        LIMIT :limit
+    '''
+
+
+# bbox of a geometry as "xmin,ymin,xmax,ymax" (same format as JoinedTable.bounds)
+_GEOM_BOUNDS_SQL = "concat_ws(',', ST_XMin(t.geom), ST_YMin(t.geom), ST_XMax(t.geom), ST_YMax(t.geom))"
+
+
+@router.get("/global")
+def global_search(
+    schema: str = Query(..., description="Municipal schema name"),
+    q: str = Query(..., min_length=2, description="Search text"),
+    limit: int = Query(20, ge=1, le=GLOBAL_SEARCH_MAX_LIMIT),
+    db: Session = Depends(get_user_main_db)
+):
+    """
+    One query across JoinedTable (pin, owner, barangay), RoadNetwork/RoadInfo
+    (road_name) and Landmarks (name). Hits are typed, ranked by trigram
+    similarity and carry a bbox [xmin, ymin, xmax, ymax] to zoom to.
+    Without pg_trgm, substring matches are ranked exact > prefix > contains
+    ("ranking": "substring"). Tables whose query failed are listed in
+    "skipped".
+    """
+    value = q.strip().lower()
+    params = {"q": value, "like": f"%{value}%", "prefix": f"{value}%", "limit": limit}
+    trigram = search_indexes.has_trgm(db)
+    hits = []
+    skipped = []
+
+    joined_columns = catalog.table_columns(db, schema, "JoinedTable")
+    owner_sql = 'concat_ws(\', \', t."l_lastname", t."l_frstname")' \
+        if {"l_lastname", "l_frstname"} <= set(joined_columns) else 't."pin"'
+    parcel_bounds_sql = 't."bounds"' if "bounds" in joined_columns else "NULL"
+    road_tables = [t for t in ("RoadNetwork", "RoadInfo") if catalog.table_exists(db, schema, t)]
+
+    sources = [
+        ("parcel", "JoinedTable",
+         f't."pin" AS id, {owner_sql} AS label, {parcel_bounds_sql} AS bounds'),
+        ("road", road_tables[0] if road_tables else None,
+         f't."id" AS id, t."road_name" AS label, {_GEOM_BOUNDS_SQL} AS bounds'),
+        ("landmark", "Landmarks",
+         f't."id" AS id, t."name" AS label, {_GEOM_BOUNDS_SQL} AS bounds'),
+    ]
+
+    for hit_type, table, select_sql in sources:
+        if not table or not catalog.table_exists(db, schema, table):
+            continue
+        fields = search_indexes.text_columns(
+            db, schema, table, search_indexes.GLOBAL_SEARCH_FIELDS[table]
+        )
+        if not fields:
+            continue
+
+        try:
+            rows = db.execute(
+                text(_global_search_sql(schema, table, fields, select_sql, trigram)),
+                params
+            ).mappings().all()
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Global search skipped {schema}.{table}: {e}")
+            skipped.append(table)
+            continue
+
+        hits.extend(
+            {
+                "type": hit_type,
+                "id": row["id"],
+                "label": row["label"],
+                "score": float(row["score"] or 0),
+                "bbox": _parse_bounds(row["bounds"]),
+                "source_table": table,
+            }
+            for row in rows
+        )
+
+    hits.sort(key=lambda h: h["score"], reverse=True)
+    hits = hits[:limit]
+    print(f"✅ Global search '{q}' in {schema}: {len(hits)} hit(s)")
+    return {"status": "success", "data": hits, "count": len(hits),
+            "ranking": "trigram" if trigram else "substring", "skipped": skipped}
+
+
+# ============================================================
+# ⌨️ 6. SUGGEST (typeahead)
+# ============================================================
+
+@router.get("/suggest")
+def suggest(
+    background_tasks: BackgroundTasks,
+    schema: str = Query(..., description="Municipal schema name"),
+    q: str = Query(..., min_length=1, description="Typed prefix"),
+    limit: int = Query(10, ge=1, le=50),
+    types: Optional[str] = Query(None, description="Comma-separated: pin, owner, road, landmark"),
+    db: Session = Depends(get_user_main_db)
+):
+    """
+    Prefix suggestions for PINs, owner names, road names and landmark names,
+    answered from a per-schema in-memory index (no database round trip once
+    built). Edits mark the index stale; it is rebuilt in the background.
+    """
+    wanted = None
+    if types:
+        wanted = {t.strip() for t in types.split(",") if t.strip()}
+        unknown = wanted - set(suggest_index.SUGGEST_TYPES)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown types: {', '.join(sorted(unknown))}")
+
+    try:
+        index, needs_refresh = suggest_index.get_index(db, schema)
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Suggest index build failed for {schema}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if needs_refresh:
+        background_tasks.add_task(
+            suggest_index.refresh, db.get_bind(), catalog.db_key(db), schema
+        )
+
+    data = index.lookup(q, limit, wanted)
+    return {"status": "success", "data": data, "count": len(data)}
+
+
+# ============================================================
+# 📐 7. SPATIAL SEARCH (radius, polygon, buffered line)
+# ============================================================
+
+SPATIAL_MAX_RADIUS = 10000      # meters
+SPATIAL_MAX_LIMIT = 1000
+
+
+def _spatial_layers(db: Session, schema: str, wanted: Optional[set]) -> list:
+    """(layer name, table, extra property columns) for the requested layer kinds."""
+    layers = []
+    if wanted is None or "parcels" in wanted:
+        layers += [(f"parcels:{t}", t, ["pin"]) for t in list_parcel_tables(db, schema)]
+    if wanted is None or "roads" in wanted:
+        for table in ("RoadNetwork", "RoadInfo"):
+            if catalog.table_exists(db, schema, table):
+                layers.append(("roads", table, ["road_name"]))
+                break
+    if wanted is None or "landmarks" in wanted:
+        if catalog.table_exists(db, schema, "Landmarks"):
+            layers.append(("landmarks", "Landmarks", ["name", "type"]))
+    return layers
+
+
+@router.post("/spatial")
+async def spatial_search(request: Request, db: Session = Depends(get_user_main_db)):
+    """
+    Features intersecting a GeoJSON geometry (EPSG:4326), optionally buffered
+    by "radius" meters (point + radius, line corridor, grown polygon).
+    Body: schema, geometry, radius, layers (parcels | roads | landmarks),
+    limit (per layer), cursors ({layer: next_cursor}), include_geometry.
+    The area is built once and matched with ST_Intersects on the GiST index;
+    each layer is keyset-paginated on its key column.
+    """
+    data = await request.json()
+    schema = data.get("schema")
+    geometry = data.get("geometry")
+    if not schema or not geometry:
+        raise HTTPException(status_code=400, detail="schema and geometry are required for spatial search.")
+    if not isinstance(geometry, dict):
+        raise HTTPException(status_code=400, detail="geometry must be a GeoJSON geometry object")
+
+    # Validate up front instead of interpreting PostGIS error messages
+    try:
+        parsed = shape(geometry)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid geometry: {e}")
+    if parsed.is_empty or not parsed.is_valid:
+        reason = "empty geometry" if parsed.is_empty else explain_validity(parsed)
+        raise HTTPException(status_code=400, detail=f"Invalid geometry: {reason}")
+
+    try:
+        radius = float(data.get("radius") or 0)
+        limit = int(data.get("limit", 200))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="radius and limit must be numbers")
+    if radius < 0 or radius > SPATIAL_MAX_RADIUS:
+        raise HTTPException(status_code=400, detail=f"radius must be between 0 and {SPATIAL_MAX_RADIUS} m")
+    if limit < 1 or limit > SPATIAL_MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {SPATIAL_MAX_LIMIT}")
+    if geometry.get("type") in ("Point", "MultiPoint", "LineString", "MultiLineString") and radius == 0:
+        raise HTTPException(status_code=400, detail=f"{geometry.get('type')} search needs a radius")
+
+    wanted = set(data["layers"]) if data.get("layers") else None
+    cursors = data.get("cursors") or {}
+    include_geometry = data.get("include_geometry", True)
+
+    # Buffer in meters through geography, then back to geometry so the
+    # intersects test can use the index on t.geom
+    area_sql = (
+        "ST_Buffer(ST_SetSRID(ST_GeomFromGeoJSON(:area), 4326)::geography, :radius)::geometry"
+        if radius > 0 else "ST_SetSRID(ST_GeomFromGeoJSON(:area), 4326)"
+    )
+    params = {"area": json.dumps(geometry), "radius": radius, "limit": limit + 1}
+
+    results = {}
+    for layer, table, extra in _spatial_layers(db, schema, wanted):
+        columns = catalog.table_columns(db, schema, table)
+        try:
+            key = key_column(db, schema, table)
+        except HTTPException:
+            print(f"⚠️ Spatial search skipped {schema}.{table}: no key column")
+            continue
+        props = [key] + [c for c in extra if c in columns and c != key]
+
+        cursor_sql = ""
+        layer_params = dict(params)
+        if cursors.get(layer):
+            cursor_sql = f'AND t."{key}" > :after'
+            layer_params["after"] = decode_cursor(cursors[layer])["k"]
+
+        geom_select = ", ST_AsGeoJSON(t.geom)::json AS geometry" if include_geometry else ""
+        try:
+            rows = db.execute(text(f'''
+                WITH area AS (SELECT {area_sql} AS g)
+                SELECT {", ".join(f't."{c}"' for c in props)}{geom_select}
+                FROM "{schema}"."{table}" t, area
+                WHERE ST_Intersects(t.geom, area.g) {cursor_sql}
+                ORDER BY t."{key}"
+                LIMIT :limit
+            '''), layer_params).mappings().all()
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Spatial search skipped {schema}.{table}: {e}")
+            continue
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor({"k": rows[-1][key]})
+
+        results[layer] = {
+            "source_table": table,
+            "features": [
+                {
+                    "type": "Feature",
+                    "geometry": row.get("geometry"),
+                    "properties": {c: row[c] for c in props},
+                }
+                for row in rows
+            ],
+            "next_cursor": next_cursor,
+        }
+
+    total = sum(len(r["features"]) for r in results.values())
+    print(f"✅ Spatial search in {schema}: {total} feature(s) across {len(results)} layer(s)")
+    return {"status": "success", "layers": results}
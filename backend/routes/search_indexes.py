@@ -0,0 +1,130 @@
+# routes/search_indexes.py
+# Managed pg_trgm indexes for substring / fuzzy search columns.
+import hashlib
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from routes import catalog
+
+# JoinedTable fields searched from the property search panel
+PROPERTY_SEARCH_FIELDS = (
+    "pin", "l_lastname", "l_frstname", "lot_no", "blk_no", "brgy_nm",
+    "arpn", "td", "parcel_cod", "sect_code", "cad_no",
+)
+
+# Fields matched by /search/global, per table
+GLOBAL_SEARCH_FIELDS = {
+    "JoinedTable": ("pin", "l_lastname", "l_frstname", "brgy_nm"),
+    "RoadNetwork": ("road_name",),
+    "RoadInfo": ("road_name",),
+    "Landmarks": ("name",),
+}
+
+# Only these types support lower(col) directly
+TEXT_TYPES = ("text", "character varying", "character")
+
+# Seconds before a database without pg_trgm is checked again
+TRGM_RECHECK_SECONDS = 300
+
+_lock = threading.Lock()
+
+# db_key -> (checked_at, pg_trgm installed)
+_trgm_available: Dict[str, Tuple[float, bool]] = {}
+
+
+def has_trgm(db: Session) -> bool:
+    """
+    Whether pg_trgm (similarity(), %) is installed in the session's database.
+    Search routes fall back to plain LIKE matching when it is not; the
+    extension is created by the admin search-index step.
+    """
+    key = catalog.db_key(db)
+    with _lock:
+        cached = _trgm_available.get(key)
+    if cached and (cached[1] or time.time() - cached[0] < TRGM_RECHECK_SECONDS):
+        return cached[1]
+
+    available = bool(db.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')"
+    )).scalar())
+    with _lock:
+        _trgm_available[key] = (time.time(), available)
+    if not available:
+        print(f"⚠️ pg_trgm not installed in {key}; search uses LIKE only")
+    return available
+
+
+def trgm_index_name(table: str, column: str) -> str:
+    """Stable index name within Postgres' 63-character limit."""
+    digest = hashlib.sha1(f"{table}.{column}".encode("utf-8")).hexdigest()[:8]
+    return f"trgm_{table[:20]}_{column[:20]}_{digest}".lower()
+
+
+def text_columns(db: Session, schema: str, table: str, columns) -> List[str]:
+    types = catalog.column_types(db, schema, table)
+    return [c for c in columns if types.get(c) in TEXT_TYPES]
+
+
+def search_index_targets(db: Session, schema: str) -> Dict[str, List[str]]:
+    """table -> text columns to index: property search plus global search fields."""
+    targets: Dict[str, List[str]] = {}
+    wanted = {"JoinedTable": PROPERTY_SEARCH_FIELDS}
+    for table, fields in GLOBAL_SEARCH_FIELDS.items():
+        wanted[table] = tuple(dict.fromkeys(wanted.get(table, ()) + fields))
+    for table, fields in wanted.items():
+        if catalog.table_exists(db, schema, table):
+            columns = text_columns(db, schema, table, fields)
+            if columns:
+                targets[table] = columns
+    return targets
+
+
+def ensure_trgm_indexes(engine, schema: str, table: str, columns: List[str]) -> Dict[str, str]:
+    """
+    Create GIN trigram indexes on lower(column) (CONCURRENTLY, so edits are
+    not blocked). Matches the LOWER("col") LIKE '%..%' predicates used by the
+    search routes as well as similarity() / % lookups.
+
+    DDL on the provincial database: run from the admin endpoint, never from
+    a search request. An INVALID index left by a failed concurrent build is
+    dropped and rebuilt. Returns column -> "ok" or the error message.
+    """
+    results: Dict[str, str] = {}
+    # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        try:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        except Exception as e:
+            print(f"⚠️ pg_trgm extension unavailable: {e}")
+            return {col: f"pg_trgm unavailable: {e}" for col in columns}
+        url = engine.url
+        with _lock:
+            _trgm_available[f"{url.host}:{url.port}/{url.database}"] = (time.time(), True)
+
+        for col in columns:
+            name = trgm_index_name(table, col)
+            try:
+                invalid = conn.execute(text("""
+                    SELECT NOT i.indisvalid
+                    FROM pg_index i
+                    WHERE i.indexrelid = to_regclass(:index)
+                """), {"index": f'"{schema}"."{name}"'}).scalar()
+                if invalid:
+                    print(f"🧹 Dropping invalid index {schema}.{name}")
+                    conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{schema}"."{name}"'))
+
+                conn.execute(text(f'''
+                    CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}"
+                    ON "{schema}"."{table}" USING gin (lower("{col}") gin_trgm_ops)
+                '''))
+                results[col] = "ok"
+            except Exception as e:
+                print(f"⚠️ Trigram index on {schema}.{table}.{col} failed: {e}")
+                results[col] = str(e)
+
+    print(f"🔎 Trigram indexes on {schema}.{table}: {results}")
+    return results
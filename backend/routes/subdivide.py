@@ -6,6 +6,8 @@ import json
 
 from auth.dependencies import get_user_main_db, get_current_user
 from auth.models import User
+from routes import layer_versions
+from routes import catalog
 
 router = APIRouter()
 
@@ -133,12 +135,8 @@ async def subdivide_parcel(
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
             print(f"🧩 Subdivide SAVE by {current_user.user_name}: schema={schema}, table={table}, pin={pin}")
 
-            # === Detect actual log table columns ===
-            cur.execute("""
-                SELECT column_name FROM information_schema.columns
-                WHERE table_schema = %s AND table_name = %s
-            """, (schema, "parcel_transaction_log"))
-            log_columns = [r["column_name"] for r in cur.fetchall()]
+            # === Detect actual log table columns (cached catalog) ===
+            log_columns = catalog.table_columns(db, schema, "parcel_transaction_log")
 
             # === 1. Get original parcel geometry ===
             cur.execute(f'''
@@ -206,9 +204,11 @@ async def subdivide_parcel(
             suggested_pins = [f"{prefix}-{str(next_suffix + i).zfill(3)}" for i in range(len(parts))]
 
             # === 6. Insert and log new parts safely ===
+            created_pins = []
             for idx, geom in enumerate(parts):
                 final_pin = (new_pins[idx] if new_pins and idx < len(new_pins)
                              else suggested_pins[idx])
+                created_pins.append(final_pin)
                 raw_geom = geom["geom"]
                 new_props = {k: None for k in merged_props.keys() if k.lower() not in ("id", "geom")}
                 new_props["pin"] = final_pin
@@ -239,6 +239,7 @@ async def subdivide_parcel(
                 ''', [table, "new (subdivide)", transaction_date] + log_vals + [raw_geom])
 
             conn.commit()
+            layer_versions.layer_changed(db, schema, pins=[pin] + created_pins)
             print(f"✅ Subdivision saved successfully ({len(parts)} parts).")
 
             return {
@@ -0,0 +1,177 @@
+# routes/suggest_index.py
+# Per-schema in-memory prefix index for typeahead suggestions.
+#
+# Entries are kept in one sorted list of normalized keys; a lookup is a
+# bisect to the first key >= prefix followed by a short forward walk, so
+# suggestions never touch the database once the index is built.
+import os
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from routes import catalog
+
+# Schemas kept in memory (least recently used dropped first)
+SUGGEST_MAX_SCHEMAS = int(os.getenv("SUGGEST_MAX_SCHEMAS", "16"))
+
+SUGGEST_TYPES = ("pin", "owner", "road", "landmark")
+
+_lock = threading.Lock()
+
+# (db_key, schema) -> SuggestIndex
+_indexes: "OrderedDict[Tuple[str, str], SuggestIndex]" = OrderedDict()
+
+# (db_key, schema) being rebuilt in the background
+_rebuilding = set()
+
+# (db_key, schema) -> lock held while its first (synchronous) build runs
+_build_locks: Dict[Tuple[str, str], threading.Lock] = {}
+
+# (db_key, schema) -> invalidation count; an index built across an edit
+# stays stale
+_generations: Dict[Tuple[str, str], int] = {}
+
+
+def _normalize(value: str) -> str:
+    return " ".join(value.lower().split())
+
+
+class SuggestIndex:
+    def __init__(self, entries: List[Tuple[str, str, str]]):
+        # entries: (normalized key, display label, type)
+        entries = sorted(set(entries))
+        self.keys = [e[0] for e in entries]
+        self.entries = entries
+        self.stale = False
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, prefix: str, limit: int, types: Optional[set] = None) -> List[Dict[str, str]]:
+        prefix = _normalize(prefix)
+        results = []
+        seen = set()
+        i = bisect_left(self.keys, prefix)
+        while i < len(self.keys) and self.keys[i].startswith(prefix):
+            _, label, kind = self.entries[i]
+            if (types is None or kind in types) and (label, kind) not in seen:
+                seen.add((label, kind))
+                results.append({"value": label, "type": kind})
+                if len(results) >= limit:
+                    break
+            i += 1
+        return results
+
+
+def _build(db: Session, schema: str) -> SuggestIndex:
+    entries: List[Tuple[str, str, str]] = []
+
+    def add(value, kind: str):
+        if value is None:
+            return
+        label = " ".join(str(value).split())
+        if label:
+            entries.append((_normalize(label), label, kind))
+
+    joined = catalog.table_columns(db, schema, "JoinedTable")
+    if "pin" in joined:
+        for (pin,) in db.execute(text(
+            f'SELECT DISTINCT "pin" FROM "{schema}"."JoinedTable" WHERE "pin" IS NOT NULL'
+        )):
+            add(pin, "pin")
+    if {"l_lastname", "l_frstname"} <= set(joined):
+        for last, first in db.execute(text(f'''
+            SELECT DISTINCT "l_lastname", "l_frstname"
+            FROM "{schema}"."JoinedTable"
+            WHERE "l_lastname" IS NOT NULL OR "l_frstname" IS NOT NULL
+        ''')):
+            # Reachable by typing either the last or the first name
+            full = ", ".join(str(v) for v in (last, first) if v)
+            add(full, "owner")
+            if first and last:
+                entries.append((_normalize(f"{first} {last}"), " ".join(full.split()), "owner"))
+
+    for road_table in ("RoadNetwork", "RoadInfo"):
+        if "road_name" in catalog.table_columns(db, schema, road_table):
+            for (name,) in db.execute(text(
+                f'SELECT DISTINCT "road_name" FROM "{schema}"."{road_table}" WHERE "road_name" IS NOT NULL'
+            )):
+                add(name, "road")
+            break
+
+    if "name" in catalog.table_columns(db, schema, "Landmarks"):
+        for (name,) in db.execute(text(
+            f'SELECT DISTINCT "name" FROM "{schema}"."Landmarks" WHERE "name" IS NOT NULL'
+        )):
+            add(name, "landmark")
+
+    index = SuggestIndex(entries)
+    print(f"🔤 Built suggest index for {schema}: {len(index)} entries")
+    return index
+
+
+def _store(key: Tuple[str, str], index: SuggestIndex, build_generation: int):
+    with _lock:
+        if _generations.get(key, 0) != build_generation:
+            index.stale = True
+        _indexes[key] = index
+        _indexes.move_to_end(key)
+        while len(_indexes) > SUGGEST_MAX_SCHEMAS:
+            _indexes.popitem(last=False)
+
+
+def get_index(db: Session, schema: str) -> Tuple[SuggestIndex, bool]:
+    """
+    (index, needs_refresh). A missing index is built synchronously; a stale
+    one is returned as-is and the caller schedules refresh() in the background.
+    """
+    key = (catalog.db_key(db), schema)
+    with _lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            needs_refresh = index.stale and key not in _rebuilding
+            if needs_refresh:
+                _rebuilding.add(key)
+            return index, needs_refresh
+
+    # One first build per schema: concurrent requests (a user typing "a",
+    # "ab", "abc") wait for it instead of each scanning the tables
+    with _lock:
+        build_lock = _build_locks.setdefault(key, threading.Lock())
+    with build_lock:
+        with _lock:
+            index = _indexes.get(key)
+        if index is not None:
+            return index, False
+
+        generation = _generations.get(key, 0)
+        index = _build(db, schema)
+        _store(key, index, generation)
+        return index, False
+
+
+def refresh(engine, key: str, schema: str):
+    """Rebuild a stale index on its own session (background task)."""
+    try:
+        generation = _generations.get((key, schema), 0)
+        with Session(bind=engine) as db:
+            _store((key, schema), _build(db, schema), generation)
+    except Exception as e:
+        print(f"⚠️ Suggest index rebuild failed for {schema}: {e}")
+    finally:
+        with _lock:
+            _rebuilding.discard((key, schema))
+
+
+def invalidate(db_key: str, schema: str):
+    """Mark a schema's index stale (called from layer_versions.layer_changed)."""
+    with _lock:
+        _generations[(db_key, schema)] = _generations.get((db_key, schema), 0) + 1
+        index = _indexes.get((db_key, schema))
+        if index is not None:
+            index.stale = True
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 import psycopg
 from auth.dependencies import get_user_main_db
+from routes import catalog
 
 router = APIRouter()
 
@@ -74,6 +75,7 @@ async def save_sync_config(request: Request, db: Session = Depends(get_user_main
         """), {"host": host, "port": port, "username": username, "password": password})
 
         db.commit()
+        catalog.invalidate(db, schema)
         print(f"✅ SyncCreds saved for {schema}: {username}@{host}:{port}")
         return {"status": "success", "message": "Credentials saved successfully."}
 
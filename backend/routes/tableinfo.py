@@ -1,13 +1,16 @@
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException
+from sqlalchemy.orm import Session
+from typing import Optional
+from auth.dependencies import get_user_main_db
 from db import get_connection
+from routes import facets
 
 router = APIRouter()
 
 @router.get("/tables-in-schema")
 def get_tables_in_schema(schema: str = Query(...)):
     try:
-        conn = get_connection()
-        with conn.cursor() as cur:
+        with get_connection() as conn, conn.cursor() as cur:
             cur.execute("""
                 SELECT table_name
                 FROM information_schema.tables
@@ -27,8 +30,7 @@ def get_distinct_values(
     column: str = Query(...)
 ):
     try:
-        conn = get_connection()
-        with conn.cursor() as cur:
+        with get_connection() as conn, conn.cursor() as cur:
             sql = f'SELECT DISTINCT "{column}" FROM "{schema}"."{table}" WHERE "{column}" IS NOT NULL'
             cur.execute(sql)
             rows = cur.fetchall()
@@ -36,3 +38,26 @@ def get_distinct_values(
         return {"status": "success", "data": values}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/facets")
+def get_facets(
+    schema: str = Query(...),
+    table: str = Query(...),
+    column: str = Query(...),
+    limit: int = Query(100, description="Max values returned"),
+    prefix: Optional[str] = Query(None, description="Only values starting with this text"),
+    sort: str = Query("value", description="value | count"),
+    db: Session = Depends(get_user_main_db)
+):
+    """
+    Distinct values of a column with row counts (limit/prefix aware).
+    Results are cached until the next edit in the schema.
+    """
+    try:
+        return facets.column_facets(db, schema, table, column, limit, prefix, sort)
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Facet query failed for {schema}.{table}.{column}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
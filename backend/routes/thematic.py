@@ -1,48 +1,172 @@
 # routes/thematic.py
-from fastapi import APIRouter, HTTPException
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from auth.dependencies import get_current_admin
+from auth.models import Admin
 from db import get_connection
+from routes.layer_utils import feature_collection_sql, parse_bbox
 
 router = APIRouter()
 
-@router.get("/thematic-layers")
-def get_thematic_layers():
-    try:
-        conn = get_connection()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+# Seconds a serialized (unfiltered) layer stays in memory
+THEMATIC_CACHE_SECONDS = int(os.getenv("THEMATIC_CACHE_SECONDS", "3600"))
 
-    thematic_features = []
+_lock = threading.Lock()
 
-    with conn.cursor() as cur:
+# Thematic layers live in the shared public schema (the connection is not
+# user-scoped, so provincial schemas are never listed here)
+THEMATIC_SCHEMA = "public"
+
+# layer id (table name) -> {"schema": ..., "table": ...}; None until first discovery
+_registry: Optional[Dict[str, Dict[str, str]]] = None
+
+# layer id -> (serialized_at, FeatureCollection text)
+_layer_cache: Dict[str, tuple] = {}
+
+
+# ==========================================================
+# 📚 Registry
+# ==========================================================
+def _discover_layers() -> Dict[str, Dict[str, str]]:
+    """Find every public table with both geom and elevation columns (one query)."""
+    with get_connection() as conn, conn.cursor() as cur:
         cur.execute("""
             SELECT table_name
             FROM information_schema.columns
             WHERE column_name IN ('geom', 'elevation')
+              AND table_schema = %(schema)s
             GROUP BY table_name
             HAVING COUNT(DISTINCT column_name) = 2
-        """)
-        tables = [row["table_name"] for row in cur.fetchall()]
-
-    for table in tables:
-        with conn.cursor() as cur:
-            try:
-                cur.execute(f'''
-                    SELECT *, ST_AsGeoJSON(geom)::json AS geometry
-                    FROM "{table}"
-                ''')
-                rows = cur.fetchall()
-            except Exception as e:
-                print(f"Skipping {table}: {e}")
-                continue
-
-            for row in rows:
-                props = row.copy()
-                geometry = props.pop("geometry")
-                thematic_features.append({
-                    "type": "Feature",
-                    "geometry": geometry,
-                    "properties": props
-                })
+            ORDER BY table_name
+        """, {"schema": THEMATIC_SCHEMA})
+        rows = cur.fetchall()
+
+    return {
+        row["table_name"]: {"schema": THEMATIC_SCHEMA, "table": row["table_name"]}
+        for row in rows
+    }
+
+
+def get_registry(refresh: bool = False) -> Dict[str, Dict[str, str]]:
+    global _registry
+    with _lock:
+        if _registry is not None and not refresh:
+            return _registry
+
+    layers = _discover_layers()
+    with _lock:
+        _registry = layers
+        _layer_cache.clear()
+    print(f"🗺️ Thematic registry: {len(layers)} layer(s)")
+    return layers
+
+
+def _get_layer(layer_id: str) -> Dict[str, str]:
+    layer = get_registry().get(layer_id)
+    if layer is None:
+        raise HTTPException(status_code=404, detail=f"Unknown thematic layer '{layer_id}'")
+    return layer
+
+
+def _layer_collection(layer: Dict[str, str], bbox: Optional[str] = None) -> str:
+    """FeatureCollection text built by Postgres, optionally limited to a bbox."""
+    where_sql, params = "TRUE", {}
+    bounds = parse_bbox(bbox)
+    if bounds:
+        where_sql = "t.geom && ST_MakeEnvelope(%(xmin)s, %(ymin)s, %(xmax)s, %(ymax)s, 4326)"
+        params = dict(zip(("xmin", "ymin", "xmax", "ymax"), bounds))
+
+    sql = feature_collection_sql(
+        f'"{layer["schema"]}"."{layer["table"]}" t',
+        "to_jsonb(t) - 'geom'",
+        where_sql=where_sql
+    )
+    with get_connection() as conn, conn.cursor() as cur:
+        cur.execute(sql, params)
+        return cur.fetchone()["collection"]
+
+
+def _cached_collection(layer_id: str) -> str:
+    with _lock:
+        cached = _layer_cache.get(layer_id)
+    if cached and time.time() - cached[0] < THEMATIC_CACHE_SECONDS:
+        return cached[1]
+
+    body = _layer_collection(_get_layer(layer_id))
+    with _lock:
+        _layer_cache[layer_id] = (time.time(), body)
+    return body
+
+
+# ==========================================================
+# 🌐 Endpoints
+# ==========================================================
+@router.get("/thematic-layers/registry")
+def list_thematic_layers():
+    """Available thematic layers (discovered once, see /refresh)."""
+    try:
+        layers = get_registry()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"status": "success", "layers": [
+        {"id": layer_id, **layer} for layer_id, layer in layers.items()
+    ]}
+
+
+@router.post("/thematic-layers/refresh")
+def refresh_thematic_layers(current_admin: Admin = Depends(get_current_admin)):
+    """Re-discover thematic layers and drop cached layer bodies (admin only)."""
+    try:
+        layers = get_registry(refresh=True)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    print(f"🗺️ Thematic registry refreshed by {current_admin.user_name}")
+    return {"status": "success", "count": len(layers)}
+
+
+@router.get("/thematic-layers/layer/{layer_id}")
+def get_thematic_layer(
+    layer_id: str,
+    bbox: Optional[str] = Query(None, description="minx,miny,maxx,maxy (EPSG:4326)")
+):
+    """
+    One thematic layer as a FeatureCollection. The full layer is served
+    from an in-memory serialized copy; bbox requests are queried directly.
+    """
+    try:
+        if bbox:
+            body = _layer_collection(_get_layer(layer_id), bbox)
+        else:
+            body = _cached_collection(layer_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Error loading thematic layer {layer_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return Response(content=body, media_type="application/json")
+
+
+@router.get("/thematic-layers")
+def get_thematic_layers():
+    """All thematic layers merged into one FeatureCollection (legacy)."""
+    try:
+        layer_ids = list(get_registry())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    thematic_features = []
+    for layer_id in layer_ids:
+        try:
+            collection = json.loads(_cached_collection(layer_id))
+        except Exception as e:
+            print(f"Skipping {layer_id}: {e}")
+            continue
+        thematic_features.extend(collection["features"])
 
     return {
         "type": "FeatureCollection",
@@ -0,0 +1,95 @@
+# routes/tiles.py
+from fastapi import APIRouter, HTTPException, Depends, Response
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+
+from auth.dependencies import get_current_user, get_user_main_db
+from auth.models import User
+from routes.layer_utils import validate_user_schemas, list_parcel_tables
+
+router = APIRouter()
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+MVT_EXTENT = 4096
+MVT_BUFFER = 64
+MAX_TILE_ZOOM = 22
+
+
+# ==========================================================
+# 🧱 Mapbox Vector Tiles for parcel layers
+# ==========================================================
+@router.get("/tiles/{schema}/{table}/{z}/{x}/{y}.mvt")
+def get_parcel_tile(
+    schema: str,
+    table: str,
+    z: int,
+    x: int,
+    y: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_user_main_db)
+):
+    """
+    Serve one vector tile (ST_AsMVT) for a parcel-like table (geom + pin),
+    the same tables that /all-barangays loads. Only features intersecting
+    the tile envelope are encoded, so the map fetches what is in view.
+    """
+    validate_user_schemas([schema], current_user)
+
+    if z < 0 or z > MAX_TILE_ZOOM or not (0 <= x < 2 ** z) or not (0 <= y < 2 ** z):
+        raise HTTPException(status_code=400, detail=f"Invalid tile coordinates {z}/{x}/{y}")
+
+    try:
+        tables = list_parcel_tables(db, schema)
+    except Exception as e:
+        print(f"❌ Error listing tables in schema '{schema}': {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if table not in tables:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Table {schema}.{table} is not a parcel layer (geom + pin)"
+        )
+
+    # Filter with && in the table's SRID (4326) so the GiST index is used,
+    # then clip/quantize in Web Mercator for the tile grid.
+    sql = text(f'''
+        WITH bounds AS (
+            SELECT ST_TileEnvelope(:z, :x, :y) AS geom
+        ),
+        mvtgeom AS (
+            SELECT
+                t."pin",
+                :schema AS source_schema,
+                :table AS source_table,
+                ST_AsMVTGeom(
+                    ST_Transform(t.geom, 3857),
+                    bounds.geom,
+                    :extent,
+                    :buffer,
+                    true
+                ) AS geom
+            FROM "{schema}"."{table}" t, bounds
+            WHERE t.geom && ST_Transform(bounds.geom, 4326)
+        )
+        SELECT ST_AsMVT(mvtgeom, :layer, :extent, 'geom')
+        FROM mvtgeom
+        WHERE geom IS NOT NULL
+    ''')
+
+    try:
+        tile = db.execute(sql, {
+            "z": z,
+            "x": x,
+            "y": y,
+            "schema": schema,
+            "table": table,
+            "layer": table,
+            "extent": MVT_EXTENT,
+            "buffer": MVT_BUFFER,
+        }).scalar()
+    except Exception as e:
+        print(f"❌ Tile query failed on {schema}.{table} @ {z}/{x}/{y}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    tile = bytes(tile) if tile else b""
+    return Response(content=tile, media_type=MVT_MEDIA_TYPE)
@@ -0,0 +1,260 @@
+# routes/topojson_utils.py
+# Minimal GeoJSON -> TopoJSON encoder (quantized, shared arcs, delta-encoded).
+#
+# Shared borders (e.g. between neighbouring barangays, or a barangay and the
+# sections inside it) become a single arc referenced by both polygons.
+from typing import Dict, List, Optional, Tuple
+
+Point = Tuple[int, int]
+
+# 1e6 grid steps across the bbox (~0.1 m over a municipality)
+DEFAULT_QUANTIZATION = 1_000_000
+
+
+def _iter_positions(geometry: Optional[dict]):
+    if not geometry:
+        return
+    gtype = geometry.get("type")
+    coords = geometry.get("coordinates")
+    if gtype == "Point":
+        yield coords
+    elif gtype in ("MultiPoint", "LineString"):
+        yield from coords
+    elif gtype in ("MultiLineString", "Polygon"):
+        for part in coords:
+            yield from part
+    elif gtype == "MultiPolygon":
+        for polygon in coords:
+            for ring in polygon:
+                yield from ring
+    elif gtype == "GeometryCollection":
+        for child in geometry.get("geometries", []):
+            yield from _iter_positions(child)
+
+
+class _Encoder:
+    def __init__(self, bbox: List[float], quantization: int):
+        x0, y0, x1, y1 = bbox
+        self.x0, self.y0 = x0, y0
+        self.kx = (x1 - x0) / (quantization - 1) if x1 > x0 else 1.0
+        self.ky = (y1 - y0) / (quantization - 1) if y1 > y0 else 1.0
+        self.lines: List[List[Point]] = []   # open lines
+        self.rings: List[List[Point]] = []   # closed rings (last == first)
+        self.arcs: List[List[Point]] = []
+        self._arc_index: Dict[Tuple[Point, ...], int] = {}
+
+    # ---------- quantization ----------
+    def quantize(self, position) -> Point:
+        return (
+            int(round((position[0] - self.x0) / self.kx)),
+            int(round((position[1] - self.y0) / self.ky)),
+        )
+
+    def _quantize_path(self, positions) -> List[Point]:
+        path: List[Point] = []
+        for position in positions:
+            point = self.quantize(position)
+            if not path or path[-1] != point:
+                path.append(point)
+        return path
+
+    def add_line(self, positions) -> Tuple[str, int]:
+        path = self._quantize_path(positions)
+        if len(path) == 1:
+            path.append(path[0])
+        self.lines.append(path)
+        return ("line", len(self.lines) - 1)
+
+    def add_ring(self, positions) -> Tuple[str, int]:
+        path = self._quantize_path(positions)
+        if path and path[0] != path[-1]:
+            path.append(path[0])
+        while len(path) < 4:
+            path.append(path[-1] if path else (0, 0))
+        self.rings.append(path)
+        return ("ring", len(self.rings) - 1)
+
+    # ---------- topology ----------
+    def _junctions(self) -> set:
+        """Points where the neighbour pair differs between occurrences, plus line ends."""
+        junctions = set()
+        neighbours: Dict[Point, Tuple[Point, Point]] = {}
+
+        def visit(point, prev, nxt):
+            seen = neighbours.get(point)
+            if seen is None:
+                neighbours[point] = (prev, nxt)
+            elif seen != (prev, nxt) and seen != (nxt, prev):
+                junctions.add(point)
+
+        for line in self.lines:
+            junctions.add(line[0])
+            junctions.add(line[-1])
+            for i in range(1, len(line) - 1):
+                visit(line[i], line[i - 1], line[i + 1])
+
+        for ring in self.rings:
+            points = ring[:-1]
+            n = len(points)
+            for i in range(n):
+                visit(points[i], points[i - 1], points[(i + 1) % n])
+
+        return junctions
+
+    def _arc_ref(self, points: List[Point]) -> int:
+        key = tuple(points)
+        if key in self._arc_index:
+            return self._arc_index[key]
+        reverse_key = tuple(reversed(points))
+        if reverse_key in self._arc_index:
+            return ~self._arc_index[reverse_key]
+        self.arcs.append(points)
+        self._arc_index[key] = len(self.arcs) - 1
+        return len(self.arcs) - 1
+
+    def _closed_arc_ref(self, ring: List[Point]) -> int:
+        """Junction-free ring: compare rotation/direction independent."""
+        def canonical(points):
+            start = points.index(min(points))
+            rotated = points[start:] + points[:start]
+            return rotated + [rotated[0]]
+
+        forward = canonical(ring[:-1])
+        key = tuple(forward)
+        if key in self._arc_index:
+            return self._arc_index[key]
+        backward = canonical(list(reversed(ring[:-1])))
+        if tuple(backward) in self._arc_index:
+            return ~self._arc_index[tuple(backward)]
+        self.arcs.append(forward)
+        self._arc_index[key] = len(self.arcs) - 1
+        return len(self.arcs) - 1
+
+    def _cut(self, path: List[Point], junctions: set) -> List[int]:
+        refs = []
+        start = 0
+        for i in range(1, len(path)):
+            if path[i] in junctions or i == len(path) - 1:
+                refs.append(self._arc_ref(path[start:i + 1]))
+                start = i
+        return refs
+
+    def build(self):
+        junctions = self._junctions()
+
+        line_arcs = [self._cut(line, junctions) for line in self.lines]
+
+        ring_arcs = []
+        for ring in self.rings:
+            points = ring[:-1]
+            first = next((i for i, p in enumerate(points) if p in junctions), None)
+            if first is None:
+                ring_arcs.append([self._closed_arc_ref(ring)])
+                continue
+            rotated = points[first:] + points[:first] + [points[first]]
+            ring_arcs.append(self._cut(rotated, junctions))
+
+        return line_arcs, ring_arcs
+
+    def encoded_arcs(self) -> List[List[List[int]]]:
+        """Delta-encode arcs as required for quantized topologies."""
+        encoded = []
+        for arc in self.arcs:
+            x, y = arc[0]
+            out = [[x, y]]
+            for px, py in arc[1:]:
+                out.append([px - x, py - y])
+                x, y = px, py
+            encoded.append(out)
+        return encoded
+
+
+def _register(encoder: _Encoder, geometry: Optional[dict]):
+    """First pass: collect lines/rings; returns a plan for the second pass."""
+    if not geometry:
+        return None
+    gtype = geometry.get("type")
+    coords = geometry.get("coordinates")
+    if gtype == "Point":
+        return ("Point", list(encoder.quantize(coords)))
+    if gtype == "MultiPoint":
+        return ("MultiPoint", [list(encoder.quantize(c)) for c in coords])
+    if gtype == "LineString":
+        return ("LineString", encoder.add_line(coords))
+    if gtype == "MultiLineString":
+        return ("MultiLineString", [encoder.add_line(line) for line in coords])
+    if gtype == "Polygon":
+        return ("Polygon", [encoder.add_ring(ring) for ring in coords])
+    if gtype == "MultiPolygon":
+        return ("MultiPolygon", [[encoder.add_ring(ring) for ring in polygon] for polygon in coords])
+    if gtype == "GeometryCollection":
+        return ("GeometryCollection", [_register(encoder, g) for g in geometry.get("geometries", [])])
+    return None
+
+
+def _resolve(plan, line_arcs, ring_arcs) -> dict:
+    if plan is None:
+        return {"type": None}
+
+    def arcs_of(ref):
+        kind, index = ref
+        return line_arcs[index] if kind == "line" else ring_arcs[index]
+
+    gtype, data = plan
+    if gtype in ("Point", "MultiPoint"):
+        return {"type": gtype, "coordinates": data}
+    if gtype == "LineString":
+        return {"type": gtype, "arcs": arcs_of(data)}
+    if gtype in ("MultiLineString", "Polygon"):
+        return {"type": gtype, "arcs": [arcs_of(ref) for ref in data]}
+    if gtype == "MultiPolygon":
+        return {"type": gtype, "arcs": [[arcs_of(ref) for ref in polygon] for polygon in data]}
+    return {
+        "type": "GeometryCollection",
+        "geometries": [_resolve(child, line_arcs, ring_arcs) for child in data],
+    }
+
+
+def to_topology(
+    collections: Dict[str, Optional[dict]],
+    quantization: int = DEFAULT_QUANTIZATION
+) -> dict:
+    """
+    Encode named GeoJSON FeatureCollections into one TopoJSON Topology.
+    Each collection becomes a GeometryCollection object; arcs are shared
+    across all objects.
+    """
+    xs, ys = [], []
+    for collection in collections.values():
+        for feature in (collection or {}).get("features", []):
+            for position in _iter_positions(feature.get("geometry")):
+                xs.append(position[0])
+                ys.append(position[1])
+    bbox = [min(xs), min(ys), max(xs), max(ys)] if xs else [0.0, 0.0, 0.0, 0.0]
+
+    encoder = _Encoder(bbox, quantization)
+    plans = {
+        name: [
+            (_register(encoder, feature.get("geometry")), feature.get("properties") or {})
+            for feature in (collection or {}).get("features", [])
+        ]
+        for name, collection in collections.items()
+    }
+    line_arcs, ring_arcs = encoder.build()
+
+    objects = {}
+    for name, items in plans.items():
+        geometries = []
+        for plan, properties in items:
+            geometry = _resolve(plan, line_arcs, ring_arcs)
+            geometry["properties"] = properties
+            geometries.append(geometry)
+        objects[name] = {"type": "GeometryCollection", "geometries": geometries}
+
+    return {
+        "type": "Topology",
+        "bbox": bbox,
+        "transform": {"scale": [encoder.kx, encoder.ky], "translate": [encoder.x0, encoder.y0]},
+        "objects": objects,
+        "arcs": encoder.encoded_arcs(),
+    }